@@ -15,8 +15,20 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000"
 
     database_url: str = "sqlite:///./nao_medical.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0
+    search_ddl_lock_timeout_ms: int = 5000
+    sqlite_wal: bool = True
+    sqlite_mmap_bytes: int = 268435456
 
     ai_provider: str = "groq"
+    ai_translate_provider: str = ""
+    ai_transcribe_provider: str = ""
+    ai_summary_provider: str = ""
     gemini_api_key: str = ""
     gemini_translation_model: str = "gemini-2.0-flash"
     gemini_summary_model: str = "gemini-2.0-flash"
@@ -26,6 +38,75 @@ class Settings(BaseSettings):
     groq_summary_model: str = "llama-3.3-70b-versatile"
     groq_transcribe_model: str = "whisper-large-v3-turbo"
     ai_timeout_seconds: int = 20
+    groq_timeout_seconds: int = 0
+    gemini_timeout_seconds: int = 0
+
+    groq_rpm: int = 0
+    groq_tpm: int = 0
+    gemini_rpm: int = 0
+    gemini_tpm: int = 0
+
+    ai_translate_routing: str = "single"
+    ai_hedge_provider: str = ""
+    hedge_default_delay_ms: int = 800
+    hedge_min_delay_ms: int = 150
+    hedge_min_samples: int = 20
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+
+    ai_max_concurrency: int = 16
+    rate_limit_burst_seconds: float = 10.0
+    rate_limit_queue_timeout_seconds: float = 30.0
+    rate_limit_default_backoff_seconds: float = 2.0
+    rate_limit_max_retries: int = 2
+    rate_limit_max_retry_after_seconds: float = 10.0
+
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http_http2: bool = True
+
+    translation_cache_enabled: bool = True
+    translation_cache_max_entries: int = 5000
+    translation_cache_ttl_seconds: int = 86400
+    translation_cache_max_text_chars: int = 500
+    translation_cache_persistent: bool = False
+    translation_cache_prune_interval_seconds: int = 3600
+    translation_batching_enabled: bool = False
+    translation_batch_window_ms: int = 10
+    translation_batch_max_items: int = 16
+    translation_batch_max_chars: int = 4000
+
+    glossary_enabled: bool = True
+    glossary_refresh_every: int = 6
+    glossary_source_messages: int = 30
+    glossary_max_terms: int = 60
+    glossary_prompt_terms: int = 12
+    glossary_cache_ttl_seconds: int = 300
+    glossary_cache_max_conversations: int = 1000
+
+    metrics_enabled: bool = True
+    metrics_server_timing: bool = True
+    metrics_prefix: str = "nao"
+
+    summary_mode: str = "auto"
+    summary_chunk_tokens: int = 6000
+    summary_map_concurrency: int = 3
+
+    audio_background_jobs: bool = True
+    job_workers: int = 2
+    job_max_attempts: int = 3
+    job_retry_base_seconds: float = 2.0
+    job_poll_seconds: float = 5.0
+    job_lease_seconds: float = 300.0
+    job_done_retention_seconds: float = 86400.0
+    job_failed_retention_seconds: float = 604800.0
+    job_prune_interval_seconds: float = 3600.0
+
+    message_broker: str = "memory"
+    pubsub_queue_size: int = 100
+    long_poll_max_seconds: int = 30
 
     s3_endpoint_url: str = ""
     s3_bucket: str = ""
@@ -33,9 +114,30 @@ class Settings(BaseSettings):
     s3_access_key_id: str = ""
     s3_secret_access_key: str = ""
     s3_public_base_url: str = ""
+    s3_max_pool_connections: int = 10
+    s3_presign_expires_seconds: int = 600
+    s3_presign_batch_max: int = 10
+    s3_range_bytes: int = 8 * 1024 * 1024
 
     max_audio_mb: int = 15
     allowed_audio_mime: str = "audio/webm"
+    audio_spool_memory_bytes: int = 1024 * 1024
+    voice_segment_concurrency: int = 2
+    voice_max_segments: int = 120
+    audio_combined_transcribe_translate: bool = True
+    audio_combined_languages: str = "en,es"
+
+    audio_normalize_enabled: bool = False
+    audio_normalize_input_mime: str = (
+        "audio/ogg,audio/mpeg,audio/mp4,audio/x-m4a,audio/wav,audio/x-wav,audio/flac"
+    )
+    audio_normalize_codec: str = "opus"
+    audio_normalize_bitrate: str = "24k"
+    audio_normalize_sample_rate: int = 16000
+    audio_trim_silence: bool = True
+    audio_silence_threshold_db: int = -45
+    audio_normalize_timeout_seconds: float = 60.0
+    ffmpeg_path: str = "ffmpeg"
 
     model_config = SettingsConfigDict(
         env_file=(str(BACKEND_ENV_PATH), ".env"),
@@ -51,6 +153,14 @@ class Settings(BaseSettings):
     def allowed_audio_mime_list(self) -> List[str]:
         return [item.strip() for item in self.allowed_audio_mime.split(",") if item.strip()]
 
+    @property
+    def audio_combined_language_list(self) -> List[str]:
+        return [item.strip() for item in self.audio_combined_languages.split(",") if item.strip()]
+
+    @property
+    def audio_normalize_input_mime_list(self) -> List[str]:
+        return [item.strip() for item in self.audio_normalize_input_mime.split(",") if item.strip()]
+
 
 settings = Settings()
 
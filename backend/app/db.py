@@ -1,14 +1,180 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateColumn
 
 from .config import settings
 
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, future=True, echo=False, connect_args=connect_args)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername == "postgresql+psycopg" or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def on_connect(self, _dbapi_conn, _record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, _dbapi_conn, _record, _proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool: Any) -> dict[str, Any]:
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), in_use=pool.checkedout(), idle=pool.checkedin(), overflow=pool.overflow())
+        return data
+
+
+def instrument_pool(target: Engine, stats: PoolStats) -> None:
+    # Pool events survive engine.dispose(), which recreates the pool.
+    event.listen(target, "connect", stats.on_connect)
+    event.listen(target, "checkout", stats.on_checkout)
+
+
+def timed_pool(base: type[QueuePool], stats: PoolStats) -> type[QueuePool]:
+    # Pool events only fire once a connection is handed out, so the time spent
+    # waiting for one is measured around the public Pool.connect().
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            stats.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.observe_wait(time.perf_counter() - start)
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return _is_sqlite(url) and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, pool_base: type[QueuePool], stats: PoolStats) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=timed_pool(pool_base, stats),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    elif settings.db_statement_timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+
+def apply_sqlite_pragmas(target: Engine) -> None:
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        if settings.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_bytes)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.db_pool_timeout_seconds * 1000)}")
+        cursor.close()
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+engine = create_engine(
+    settings.database_url,
+    future=True,
+    echo=False,
+    **engine_options(settings.database_url, QueuePool, sync_pool_stats),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    echo=False,
+    **engine_options(settings.database_url, AsyncAdaptedQueuePool, async_pool_stats),
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_pool(engine, sync_pool_stats)
+instrument_pool(async_engine.sync_engine, async_pool_stats)
+
+if _is_sqlite(settings.database_url):
+    apply_sqlite_pragmas(engine)
+    apply_sqlite_pragmas(async_engine.sync_engine)
+
+
+def add_missing_columns(bind: Engine) -> None:
+    # create_all only creates missing tables; columns added to existing models
+    # (always nullable) are appended here so older databases keep working.
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def pool_metrics() -> dict[str, dict[str, Any]]:
+    return {
+        "sync": sync_pool_stats.snapshot(engine.pool),
+        "async": async_pool_stats.snapshot(async_engine.pool),
+    }
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +182,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
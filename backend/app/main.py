@@ -1,17 +1,34 @@
 from __future__ import annotations
 
-import httpx
-from fastapi import Depends, FastAPI, HTTPException, Query
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator
+
+from fastapi import Depends, FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import and_, or_, select, text
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .config import settings
-from .db import Base, engine, get_db
+from .db import (
+    AsyncSessionLocal,
+    Base,
+    add_missing_columns,
+    async_engine,
+    engine,
+    get_async_db,
+    get_db,
+    pool_metrics,
+)
 from .models import Conversation, Message, Summary
 from .schemas import (
     LANGUAGE_OPTIONS,
     AudioFinalizeIn,
+    AudioPresignBatchIn,
+    AudioPresignBatchOut,
     AudioPresignIn,
     AudioPresignOut,
     ConversationCreate,
@@ -24,11 +41,42 @@ from .schemas import (
     SummaryOut,
     TextMessageCreate,
 )
-from .services.provider_factory import get_ai_provider
-from .services.storage import StorageService
+from .services.audio import (
+    TRANSCRIPTION_UNAVAILABLE,
+    AudioTooLargeError,
+    fail_audio_job,
+    load_audio,
+    process_audio_job,
+    transcribe_and_translate,
+)
+from .services.audio_normalize import accepted_audio_mime_list, normalize_available
+from .services.batching import translation_batcher
+from .services.glossary import conversation_glossary, glossary_store, refresh_glossary
+from .services.http_client import close_http_client
+from .services.jobs import job_queue
+from .services.pubsub import message_broker
+from .services.latency import latency_metrics
+from .services.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, render_prometheus, span
+from .services.rate_limit import governor_metrics
+from .services.routing import routing_metrics
+from .services.search import ensure_search_index, search_messages
+from .services.provider_factory import get_ai_provider, provider_registry
+from .services.translation_cache import cache_lookup, cache_store, cached_translate, translation_cache
+from .services.storage import AudioObjectMissingError, conversation_key_prefix, object_url, storage_service
+from .services.summarizer import summarize_lines
+from .services.tokens import start_encoding_load
+from .services.voice import VoiceStream, VoiceStreamTooLargeError
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.app_name)
 
+job_queue.register("audio_transcription", process_audio_job, on_failure=fail_audio_job)
+job_queue.register("glossary_refresh", refresh_glossary)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origin_list,
@@ -36,6 +84,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is outermost and times the whole request.
+app.add_middleware(MetricsMiddleware)
 
 
 def validate_language(code: str) -> None:
@@ -61,17 +111,136 @@ def message_to_out(row: Message) -> MessageOut:
         source_language=row.source_language,
         target_language=row.target_language,
         created_at=row.created_at,
+        status=row.status,
+    )
+
+
+def text_message_row(payload: TextMessageCreate, translated: str) -> Message:
+    return Message(
+        conversation_id=payload.conversation_id,
+        role=payload.role,
+        modality="text",
+        original_text=payload.text,
+        translated_text=translated,
+        transcript_text=None,
+        audio_url=None,
+        source_language=payload.source_language,
+        target_language=payload.target_language,
     )
 
 
+async def publish_message(out: MessageOut) -> None:
+    # Push delivery is best-effort; clients still catch up via list_messages.
+    try:
+        await message_broker.publish(out)
+    except Exception:
+        pass
+
+
+_detached_tasks: set[asyncio.Task] = set()
+
+
+def _detached_done(task: asyncio.Task) -> None:
+    _detached_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("detached task failed", exc_info=task.exception())
+
+
+def run_detached(coro: Any) -> asyncio.Task:
+    # Keeps a reference until the task finishes, whether or not anyone awaits it.
+    task = asyncio.create_task(coro)
+    _detached_tasks.add(task)
+    task.add_done_callback(_detached_done)
+    return task
+
+
+def summary_lines(rows: list[Message]) -> list[str]:
+    lines: list[str] = []
+    for msg in rows:
+        source = msg.original_text or msg.transcript_text or ""
+        translated = msg.translated_text or ""
+        lines.append(f"[{msg.role}] original: {source}")
+        lines.append(f"[{msg.role}] translated: {translated}")
+    return lines
+
+
+def summary_to_parsed(row: Summary) -> dict:
+    return {
+        "summary": row.summary_text,
+        "symptoms": list(row.symptoms_json or []),
+        "diagnoses": list(row.diagnoses_json or []),
+        "medications": list(row.medications_json or []),
+        "follow_up": list(row.follow_up_json or []),
+    }
+
+
+def summary_out(parsed: dict) -> SummaryOut:
+    return SummaryOut(
+        summary=parsed["summary"],
+        extracted={
+            "symptoms": parsed["symptoms"],
+            "diagnoses": parsed["diagnoses"],
+            "medications": parsed["medications"],
+            "follow_up": parsed["follow_up"],
+        },
+    )
+
+
+def sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
 @app.on_event("startup")
 def startup() -> None:
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    ensure_search_index(engine)
+    provider_registry.warm()
+    storage_service.warm()
+    start_encoding_load()
+
+
+@app.on_event("startup")
+async def start_background_services() -> None:
+    await message_broker.start()
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await job_queue.stop()
+    await message_broker.stop()
+    await close_http_client()
+    await async_engine.dispose()
+
+
+def runtime_stats() -> dict:
+    return {
+        "translation_cache": translation_cache.stats(),
+        "translation_batches": translation_batcher.stats(),
+        "glossary": glossary_store.stats(),
+        "subscribers": message_broker.subscriber_count(),
+        "db_pool": pool_metrics(),
+        "rate_limits": governor_metrics(),
+        "latency": latency_metrics(),
+        "routing": routing_metrics(),
+    }
 
 
 @app.get("/health")
-def health() -> dict:
-    return {"ok": True, "provider": settings.ai_provider}
+async def health() -> dict:
+    return {
+        "ok": True,
+        "provider": settings.ai_provider,
+        "tasks": provider_registry.active(),
+        "audio_normalize": normalize_available(),
+        **runtime_stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(render_prometheus(runtime_stats()), media_type=PROMETHEUS_CONTENT_TYPE)
 
 
 @app.post("/api/conversations", response_model=ConversationOut)
@@ -99,19 +268,20 @@ def get_conversation(conversation_id: str, db: Session = Depends(get_db)) -> Con
 
 
 @app.get("/api/conversations/{conversation_id}/messages", response_model=MessagesListOut)
-def list_messages(
+async def list_messages(
     conversation_id: str,
     after_id: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    wait: float = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
 ) -> MessagesListOut:
-    if not db.get(Conversation, conversation_id):
+    if not await db.get(Conversation, conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     base = select(Message).where(Message.conversation_id == conversation_id)
 
     if after_id:
-        cursor = db.get(Message, after_id)
+        cursor = await db.get(Message, after_id)
         if not cursor or cursor.conversation_id != conversation_id:
             raise HTTPException(status_code=400, detail="invalid_cursor")
 
@@ -122,90 +292,381 @@ def list_messages(
             )
         )
         query = base.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)
-        rows = db.scalars(query).all()
+
+        async def fetch() -> list[Message]:
+            return list((await db.scalars(query)).all())
     else:
         query = base.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
-        rows = list(reversed(db.scalars(query).all()))
+
+        async def fetch() -> list[Message]:
+            return list(reversed((await db.scalars(query)).all()))
+
+    # Clamp rather than reject so clients need not know the server's limit.
+    wait = min(wait, settings.long_poll_max_seconds)
+    rows = await fetch()
+    if not rows and wait:
+        # Long-poll: park on the conversation's channel instead of returning
+        # empty. Subscribe before re-checking so a commit in between is not lost,
+        # and end the transaction so the pooled connection is free while parked.
+        async with message_broker.subscribe(conversation_id) as queue:
+            rows = await fetch()
+            if not rows:
+                await db.rollback()
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    rows = await fetch()
 
     return MessagesListOut(items=[message_to_out(item) for item in rows])
 
 
+@app.get("/api/messages/{message_id}", response_model=MessageOut)
+async def get_message(message_id: str, db: AsyncSession = Depends(get_async_db)) -> MessageOut:
+    row = await db.get(Message, message_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message_to_out(row)
+
+
+@app.websocket("/api/conversations/{conversation_id}/ws")
+async def conversation_socket(websocket: WebSocket, conversation_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        exists = await db.get(Conversation, conversation_id) is not None
+    if not exists:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    async with message_broker.subscribe(conversation_id) as queue:
+
+        async def forward() -> None:
+            while True:
+                message = await queue.get()
+                await websocket.send_text(message.model_dump_json())
+
+        sender = asyncio.create_task(forward())
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            (result,) = await asyncio.gather(sender, return_exceptions=True)
+            if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+                logger.warning("websocket forwarder failed", exc_info=result)
+
+
+@app.websocket("/api/conversations/{conversation_id}/voice")
+async def voice_stream(
+    websocket: WebSocket,
+    conversation_id: str,
+    role: str,
+    source_language: str,
+    target_language: str,
+    mime_type: str = "audio/webm",
+) -> None:
+    # Binary frames are self-contained recording segments; a {"type": "end"}
+    # text frame finalizes the message, {"type": "cancel"} discards it.
+    async with AsyncSessionLocal() as db:
+        exists = await db.get(Conversation, conversation_id) is not None
+    if not exists:
+        await websocket.close(code=4404)
+        return
+    if (
+        role not in {"doctor", "patient"}
+        or source_language not in LANGUAGE_OPTIONS
+        or target_language not in LANGUAGE_OPTIONS
+        # Live segments go to the provider as recorded, without normalization.
+        or mime_type not in settings.allowed_audio_mime_list
+    ):
+        await websocket.close(code=4400)
+        return
+
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def send(event: dict) -> None:
+        async with send_lock:
+            await websocket.send_json(event)
+
+    async def on_partial(index: int, segment_text: str, transcript: str) -> None:
+        await send({"type": "partial", "index": index, "text": segment_text, "transcript": transcript})
+
+    stream = VoiceStream(mime_type, source_language, on_partial)
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                await stream.cancel()
+                return
+            if frame.get("bytes"):
+                try:
+                    stream.add_segment(frame["bytes"])
+                except VoiceStreamTooLargeError as exc:
+                    await stream.cancel()
+                    await send({"type": "error", "detail": str(exc)})
+                    await websocket.close(code=1009)
+                    return
+                continue
+            try:
+                control = json.loads(frame.get("text") or "{}")
+            except json.JSONDecodeError:
+                continue
+            if control.get("type") == "cancel":
+                await stream.cancel()
+                await websocket.close()
+                return
+            if control.get("type") == "end":
+                break
+    except WebSocketDisconnect:
+        await stream.cancel()
+        return
+
+    if stream.segment_count == 0:
+        await send({"type": "error", "detail": "No audio received"})
+        await websocket.close()
+        return
+
+    transcript = await stream.finish()
+    # Same fail-open behavior as finalize_audio.
+    if not transcript:
+        transcript = TRANSCRIPTION_UNAVAILABLE
+        translated = transcript
+    else:
+        try:
+            glossary = await conversation_glossary(conversation_id, transcript, source_language, target_language)
+            translated = await cached_translate(
+                get_ai_provider("translate"), transcript, source_language, target_language, glossary, conversation_id
+            )
+        except Exception:
+            translated = transcript
+
+    async with AsyncSessionLocal() as db:
+        row = Message(
+            conversation_id=conversation_id,
+            role=role,
+            modality="audio",
+            original_text=None,
+            translated_text=translated,
+            transcript_text=transcript,
+            audio_url=None,
+            source_language=source_language,
+            target_language=target_language,
+        )
+        db.add(row)
+        await db.commit()
+        await db.refresh(row)
+        out = message_to_out(row)
+    await publish_message(out)
+    await send({"type": "message", "message": out.model_dump(mode="json")})
+    await websocket.close()
+
+
 @app.post("/api/messages/text", response_model=MessageOut)
-async def send_text(payload: TextMessageCreate, db: Session = Depends(get_db)) -> MessageOut:
+async def send_text(payload: TextMessageCreate, db: AsyncSession = Depends(get_async_db)) -> MessageOut:
     validate_role(payload.role)
     validate_language(payload.source_language)
     validate_language(payload.target_language)
 
-    if not db.get(Conversation, payload.conversation_id):
+    if not await db.get(Conversation, payload.conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Fail-open fallback for demo reliability: if provider fails/rate-limits,
     # still persist and return the message so chat flow is not blocked.
     try:
-        provider = get_ai_provider()
-        translated = await provider.translate(payload.text, payload.source_language, payload.target_language)
+        provider = get_ai_provider("translate")
+        glossary = await conversation_glossary(
+            payload.conversation_id, payload.text, payload.source_language, payload.target_language
+        )
+        translated = await cached_translate(
+            provider, payload.text, payload.source_language, payload.target_language, glossary, payload.conversation_id
+        )
     except Exception:
         translated = payload.text
 
-    row = Message(
-        conversation_id=payload.conversation_id,
-        role=payload.role,
-        modality="text",
-        original_text=payload.text,
-        translated_text=translated,
-        transcript_text=None,
-        audio_url=None,
-        source_language=payload.source_language,
-        target_language=payload.target_language,
-    )
+    row = text_message_row(payload, translated)
     db.add(row)
-    db.commit()
-    db.refresh(row)
-    return message_to_out(row)
+    await db.commit()
+    await db.refresh(row)
+    out = message_to_out(row)
+    await publish_message(out)
+    return out
 
 
-@app.post("/api/audio/presign", response_model=AudioPresignOut)
-def presign_audio(payload: AudioPresignIn, db: Session = Depends(get_db)) -> AudioPresignOut:
-    if not db.get(Conversation, payload.conversation_id):
+@app.post("/api/messages/text/stream")
+async def send_text_stream(
+    payload: TextMessageCreate, db: AsyncSession = Depends(get_async_db)
+) -> StreamingResponse:
+    validate_role(payload.role)
+    validate_language(payload.source_language)
+    validate_language(payload.target_language)
+
+    if not await db.get(Conversation, payload.conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    if payload.mime_type not in settings.allowed_audio_mime_list:
-        raise HTTPException(status_code=400, detail="Only audio/webm is supported")
+    deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def translate_and_save() -> MessageOut:
+        # Same fail-open contract as send_text: the message is always persisted,
+        # with the original text as translation if the stream fails.
+        parts: list[str] = []
+        try:
+            provider = get_ai_provider("translate")
+            glossary = await conversation_glossary(
+                payload.conversation_id, payload.text, payload.source_language, payload.target_language
+            )
+            cached = await cache_lookup(
+                provider, payload.text, payload.source_language, payload.target_language, glossary
+            )
+            if cached is not None:
+                parts.append(cached)
+                deltas.put_nowait(cached)
+            else:
+                with span("translate_stream", provider):
+                    async for delta in provider.translate_stream(
+                        payload.text, payload.source_language, payload.target_language, glossary
+                    ):
+                        parts.append(delta)
+                        deltas.put_nowait(delta)
+            translated = "".join(parts).strip()
+            if not translated:
+                raise RuntimeError("empty_translation")
+            if cached is None:
+                glossary_store.note_translation(payload.conversation_id)
+                await cache_store(
+                    provider, payload.text, payload.source_language, payload.target_language, translated, glossary
+                )
+        except Exception:
+            translated = payload.text
+        finally:
+            deltas.put_nowait(None)
+
+        async with AsyncSessionLocal() as session:
+            row = text_message_row(payload, translated)
+            session.add(row)
+            await session.commit()
+            await session.refresh(row)
+            out = message_to_out(row)
+        await publish_message(out)
+        return out
+
+    async def events() -> AsyncIterator[str]:
+        # The response is cancelled when the client disconnects; the message
+        # was already sent, so translating and saving it runs in its own task.
+        saving = run_detached(translate_and_save())
+        while (delta := await deltas.get()) is not None:
+            yield sse_event("delta", json.dumps({"text": delta}))
+        out = await asyncio.shield(saving)
+        yield sse_event("message", out.model_dump_json())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def validate_presign(db: Session, conversation_id: str, mime_type: str) -> None:
+    if not db.get(Conversation, conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    if mime_type not in accepted_audio_mime_list():
+        raise HTTPException(status_code=400, detail=f"Unsupported audio type: {mime_type}")
 
     if not settings.s3_bucket:
         raise HTTPException(status_code=500, detail="S3 bucket is not configured")
 
-    storage = StorageService()
-    data = storage.presign_audio_upload(payload.conversation_id, payload.mime_type)
+
+@app.post("/api/audio/presign", response_model=AudioPresignOut)
+def presign_audio(payload: AudioPresignIn, db: Session = Depends(get_db)) -> AudioPresignOut:
+    validate_presign(db, payload.conversation_id, payload.mime_type)
+    data = storage_service.presign_audio_upload(payload.conversation_id, payload.mime_type)
     return AudioPresignOut(**data)
 
 
+@app.post("/api/audio/presign/batch", response_model=AudioPresignBatchOut)
+def presign_audio_batch(payload: AudioPresignBatchIn, db: Session = Depends(get_db)) -> AudioPresignBatchOut:
+    validate_presign(db, payload.conversation_id, payload.mime_type)
+    count = min(payload.count, settings.s3_presign_batch_max)
+    items = storage_service.presign_audio_uploads(payload.conversation_id, payload.mime_type, count)
+    return AudioPresignBatchOut(items=[AudioPresignOut(**data) for data in items])
+
+
 @app.post("/api/messages/audio/finalize", response_model=MessageOut)
-async def finalize_audio(payload: AudioFinalizeIn, db: Session = Depends(get_db)) -> MessageOut:
+async def finalize_audio(payload: AudioFinalizeIn, db: AsyncSession = Depends(get_async_db)) -> MessageOut:
     validate_role(payload.role)
     validate_language(payload.source_language)
     validate_language(payload.target_language)
 
-    if not db.get(Conversation, payload.conversation_id):
+    if not await db.get(Conversation, payload.conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-        audio_resp = await client.get(payload.audio_url)
-        audio_resp.raise_for_status()
-        audio_bytes = audio_resp.content
+    if payload.mime_type not in accepted_audio_mime_list():
+        raise HTTPException(status_code=400, detail=f"Unsupported audio type: {payload.mime_type}")
 
-    max_bytes = settings.max_audio_mb * 1024 * 1024
-    if len(audio_bytes) > max_bytes:
+    if payload.object_key:
+        if not payload.object_key.startswith(conversation_key_prefix(payload.conversation_id)):
+            raise HTTPException(status_code=400, detail="object_key does not belong to this conversation")
+        audio_url = payload.audio_url or object_url(payload.object_key)
+    elif payload.audio_url:
+        audio_url = payload.audio_url
+    else:
+        raise HTTPException(status_code=400, detail="audio_url or object_key is required")
+
+    if settings.audio_background_jobs:
+        row = Message(
+            conversation_id=payload.conversation_id,
+            role=payload.role,
+            modality="audio",
+            original_text=None,
+            translated_text=None,
+            transcript_text=None,
+            audio_url=audio_url,
+            source_language=payload.source_language,
+            target_language=payload.target_language,
+            status="pending",
+        )
+        db.add(row)
+        await db.flush()
+        job_queue.enqueue(
+            db,
+            "audio_transcription",
+            {
+                "message_id": row.id,
+                "conversation_id": payload.conversation_id,
+                "audio_url": payload.audio_url,
+                "object_key": payload.object_key,
+                "mime_type": payload.mime_type,
+                "source_language": payload.source_language,
+                "target_language": payload.target_language,
+            },
+        )
+        await db.commit()
+        await db.refresh(row)
+        job_queue.notify()
+        out = message_to_out(row)
+        await publish_message(out)
+        return out
+
+    try:
+        audio = await load_audio(payload.audio_url, payload.object_key)
+    except AudioTooLargeError:
         raise HTTPException(status_code=400, detail="Audio file too large")
+    except AudioObjectMissingError:
+        raise HTTPException(status_code=400, detail="Audio object not found")
 
     # Fail-open fallback for demo reliability: keep audio message in thread
     # even if AI transcription/translation is temporarily unavailable.
     try:
-        provider = get_ai_provider()
-        transcript = await provider.transcribe_audio(audio_bytes, "audio/webm", payload.source_language)
-        translated = await provider.translate(transcript, payload.source_language, payload.target_language)
+        with audio:
+            transcript, translated = await transcribe_and_translate(
+                audio, payload.source_language, payload.target_language, payload.mime_type, payload.conversation_id
+            )
     except Exception:
-        transcript = "[Transcription unavailable]"
+        transcript = TRANSCRIPTION_UNAVAILABLE
         translated = transcript
 
     row = Message(
@@ -215,14 +676,16 @@ async def finalize_audio(payload: AudioFinalizeIn, db: Session = Depends(get_db)
         original_text=None,
         translated_text=translated,
         transcript_text=transcript,
-        audio_url=payload.audio_url,
+        audio_url=audio_url,
         source_language=payload.source_language,
         target_language=payload.target_language,
     )
     db.add(row)
-    db.commit()
-    db.refresh(row)
-    return message_to_out(row)
+    await db.commit()
+    await db.refresh(row)
+    out = message_to_out(row)
+    await publish_message(out)
+    return out
 
 
 @app.get("/api/search", response_model=SearchOut)
@@ -230,52 +693,13 @@ def search(
     q: str = Query(min_length=1),
     conversation_id: str | None = Query(default=None),
     limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
     db: Session = Depends(get_db),
 ) -> SearchOut:
-    dialect = db.bind.dialect.name
-
-    if dialect == "postgresql":
-        sql = """
-        SELECT id, conversation_id, role, created_at,
-               ts_headline('english',
-                 coalesce(original_text,'') || ' ' || coalesce(transcript_text,'') || ' ' || coalesce(translated_text,''),
-                 plainto_tsquery('english', :q)
-               ) AS snippet
-        FROM messages
-        WHERE to_tsvector('english', coalesce(original_text,'') || ' ' || coalesce(transcript_text,'') || ' ' || coalesce(translated_text,''))
-              @@ plainto_tsquery('english', :q)
-          AND (:conversation_id IS NULL OR conversation_id = :conversation_id)
-        ORDER BY created_at DESC, id DESC
-        LIMIT :limit
-        """
-        rows = db.execute(text(sql), {"q": q, "conversation_id": conversation_id, "limit": limit}).mappings().all()
-    else:
-        pattern = f"%{q}%"
-        stmt = (
-            select(Message)
-            .where(
-                or_(
-                    Message.original_text.ilike(pattern),
-                    Message.transcript_text.ilike(pattern),
-                    Message.translated_text.ilike(pattern),
-                )
-            )
-            .order_by(Message.created_at.desc(), Message.id.desc())
-            .limit(limit)
-        )
-        if conversation_id:
-            stmt = stmt.where(Message.conversation_id == conversation_id)
-        items = db.scalars(stmt).all()
-        rows = [
-            {
-                "id": row.id,
-                "conversation_id": row.conversation_id,
-                "role": row.role,
-                "created_at": row.created_at,
-                "snippet": (row.original_text or row.transcript_text or row.translated_text or "")[:220],
-            }
-            for row in items
-        ]
+    try:
+        rows, next_cursor = search_messages(db, q, conversation_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
 
     return SearchOut(
         items=[
@@ -287,31 +711,78 @@ def search(
                 snippet=row["snippet"],
             )
             for row in rows
-        ]
+        ],
+        next_cursor=next_cursor,
     )
 
 
 @app.post("/api/conversations/{conversation_id}/summary", response_model=SummaryOut)
-async def summarize(conversation_id: str, payload: SummaryIn, db: Session = Depends(get_db)) -> SummaryOut:
-    if not db.get(Conversation, conversation_id):
+async def summarize(conversation_id: str, payload: SummaryIn, db: AsyncSession = Depends(get_async_db)) -> SummaryOut:
+    if not await db.get(Conversation, conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    rows = db.scalars(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc(), Message.id.asc())
-    ).all()
+    latest = (
+        await db.execute(
+            select(Message.id, Message.created_at)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )
+    ).first()
+    previous = await db.scalar(
+        select(Summary)
+        .where(
+            Summary.conversation_id == conversation_id,
+            Summary.style == payload.style,
+            Summary.last_message_id.is_not(None),
+        )
+        .order_by(Summary.created_at.desc())
+        .limit(1)
+    )
 
-    lines: list[str] = []
-    for msg in rows:
-        source = msg.original_text or msg.transcript_text or ""
-        translated = msg.translated_text or ""
-        lines.append(f"[{msg.role}] original: {source}")
-        lines.append(f"[{msg.role}] translated: {translated}")
+    prior: dict | None = None
+    query = select(Message).where(Message.conversation_id == conversation_id)
+    if previous is not None and previous.last_message_created_at is not None:
+        prior = summary_to_parsed(previous)
+        # Nothing new since the stored watermark: serve the cached summary.
+        if latest is None or latest.id == previous.last_message_id:
+            return summary_out(prior)
+        query = query.where(
+            or_(
+                Message.created_at > previous.last_message_created_at,
+                and_(
+                    Message.created_at == previous.last_message_created_at,
+                    Message.id > previous.last_message_id,
+                ),
+            )
+        )
+    # Audio still being transcribed has no text yet: summarize only up to the
+    # earliest pending message, so the watermark stays before it and it is
+    # picked up once its job completes.
+    pending = (
+        await db.execute(
+            select(Message.id, Message.created_at)
+            .where(Message.conversation_id == conversation_id, Message.status == "pending")
+            .order_by(Message.created_at.asc(), Message.id.asc())
+            .limit(1)
+        )
+    ).first()
+    if pending is not None:
+        query = query.where(
+            or_(
+                Message.created_at < pending.created_at,
+                and_(Message.created_at == pending.created_at, Message.id < pending.id),
+            )
+        )
+
+    rows = (await db.scalars(query.order_by(Message.created_at.asc(), Message.id.asc()))).all()
+    if prior is not None and not rows:
+        return summary_out(prior)
+    lines = summary_lines(rows)
 
     try:
-        provider = get_ai_provider()
-        parsed = await provider.summarize_medical(lines, payload.style)
+        provider = get_ai_provider("summarize")
+        parsed = await summarize_lines(provider, lines, payload.style, previous=prior)
     except ValueError:
         raise HTTPException(status_code=502, detail="summary_parse_failed")
     except RuntimeError as exc:
@@ -329,16 +800,11 @@ async def summarize(conversation_id: str, payload: SummaryIn, db: Session = Depe
         diagnoses_json=parsed["diagnoses"],
         medications_json=parsed["medications"],
         follow_up_json=parsed["follow_up"],
+        style=payload.style,
+        last_message_id=rows[-1].id if rows else None,
+        last_message_created_at=rows[-1].created_at if rows else None,
     )
     db.add(row)
-    db.commit()
+    await db.commit()
 
-    return SummaryOut(
-        summary=parsed["summary"],
-        extracted={
-            "symptoms": parsed["symptoms"],
-            "diagnoses": parsed["diagnoses"],
-            "medications": parsed["medications"],
-            "follow_up": parsed["follow_up"],
-        },
-    )
+    return summary_out(parsed)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, ForeignKey, Index, JSON, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, JSON, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -24,6 +24,9 @@ class Conversation(Base):
 
     messages: Mapped[list[Message]] = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
     summaries: Mapped[list[Summary]] = relationship("Summary", back_populates="conversation", cascade="all, delete-orphan")
+    glossary_terms: Mapped[list[GlossaryTerm]] = relationship(
+        "GlossaryTerm", back_populates="conversation", cascade="all, delete-orphan"
+    )
 
 
 class Message(Base):
@@ -41,6 +44,7 @@ class Message(Base):
 
     source_language: Mapped[str] = mapped_column(String(16), nullable=False)
     target_language: Mapped[str] = mapped_column(String(16), nullable=False)
+    status: Mapped[str | None] = mapped_column(String(16), nullable=True, default="ready")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
 
     conversation: Mapped[Conversation] = relationship("Conversation", back_populates="messages")
@@ -58,9 +62,66 @@ class Summary(Base):
     medications_json: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
     follow_up_json: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
 
+    style: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    last_message_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    last_message_created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
 
     conversation: Mapped[Conversation] = relationship("Conversation", back_populates="summaries")
 
 
+class TranslationCacheEntry(Base):
+    __tablename__ = "translation_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    source_language: Mapped[str] = mapped_column(String(16), nullable=False)
+    target_language: Mapped[str] = mapped_column(String(16), nullable=False)
+    model: Mapped[str] = mapped_column(String(128), nullable=False)
+    source_text: Mapped[str] = mapped_column(Text, nullable=False)
+    translated_text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc, index=True)
+
+
+class GlossaryTerm(Base):
+    __tablename__ = "glossary_terms"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    source_language: Mapped[str] = mapped_column(String(16), nullable=False)
+    target_language: Mapped[str] = mapped_column(String(16), nullable=False)
+    source_term: Mapped[str] = mapped_column(String(255), nullable=False)
+    target_term: Mapped[str] = mapped_column(String(255), nullable=False)
+    occurrences: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+
+    conversation: Mapped[Conversation] = relationship("Conversation", back_populates="glossary_terms")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+
+
 Index("ix_messages_conversation_created_id", Message.conversation_id, Message.created_at, Message.id)
+Index("ix_messages_created_id", Message.created_at, Message.id)
+Index("ix_jobs_status_run_after", Job.status, Job.run_after)
+Index("ix_jobs_status_updated_at", Job.status, Job.updated_at)
+Index(
+    "ix_glossary_terms_conversation_term",
+    GlossaryTerm.conversation_id,
+    GlossaryTerm.source_language,
+    GlossaryTerm.target_language,
+    GlossaryTerm.source_term,
+    unique=True,
+)
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 
 Role = Literal["doctor", "patient"]
 Modality = Literal["text", "audio"]
+MessageStatus = Literal["pending", "ready", "failed"]
 
 LANGUAGE_OPTIONS = ["en", "es", "zh", "ar", "hi", "bn", "pt", "ru"]
 
@@ -38,6 +39,7 @@ class MessageOut(BaseModel):
     source_language: str
     target_language: str
     created_at: datetime
+    status: MessageStatus | None = None
 
 
 class TextMessageCreate(BaseModel):
@@ -57,12 +59,25 @@ class AudioPresignOut(BaseModel):
     upload_url: str
     file_url: str
     object_key: str
+    expires_in: int | None = None
+
+
+class AudioPresignBatchIn(BaseModel):
+    conversation_id: str
+    mime_type: str
+    count: int = Field(default=3, ge=1)
+
+
+class AudioPresignBatchOut(BaseModel):
+    items: list[AudioPresignOut]
 
 
 class AudioFinalizeIn(BaseModel):
     conversation_id: str
     role: Role
-    audio_url: str
+    audio_url: str | None = None
+    object_key: str | None = None
+    mime_type: str = "audio/webm"
     source_language: str
     target_language: str
 
@@ -76,11 +91,13 @@ class SearchResultOut(BaseModel):
     conversation_id: str
     role: Role
     created_at: datetime
+    # HTML-escaped text; matched terms are the only markup, as <mark> tags.
     snippet: str
 
 
 class SearchOut(BaseModel):
     items: list[SearchResultOut]
+    next_cursor: str | None = None
 
 
 class SummaryIn(BaseModel):
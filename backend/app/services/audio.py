@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+from typing import Any, BinaryIO
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models import Message
+from ..schemas import MessageOut
+from .audio_normalize import AudioNormalizeError, normalize_audio
+from .glossary import conversation_glossary, conversation_top_glossary, glossary_store
+from .http_client import get_http_client, request_timeout
+from .jobs import PermanentJobError
+from .metrics import span
+from .provider_factory import get_ai_provider
+from .pubsub import message_broker
+from .storage import AudioObjectMissingError, download_object, head_object_size
+from .translation_cache import cached_translate
+
+TRANSCRIPTION_UNAVAILABLE = "[Transcription unavailable]"
+
+
+class AudioTooLargeError(ValueError):
+    pass
+
+
+FETCH_CHUNK_BYTES = 64 * 1024
+
+
+async def fetch_audio(audio_url: str) -> BinaryIO:
+    # Streams the body into a spooled temp file: small clips stay in memory,
+    # larger ones go to disk, and the download stops as soon as it passes
+    # MAX_AUDIO_MB. The caller owns (and must close) the returned file.
+    max_bytes = settings.max_audio_mb * 1024 * 1024
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.audio_spool_memory_bytes)
+    client = get_http_client()
+    try:
+        async with client.stream("GET", audio_url, timeout=request_timeout(settings.ai_timeout_seconds)) as resp:
+            resp.raise_for_status()
+            declared = resp.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > max_bytes:
+                raise AudioTooLargeError("Audio file too large")
+            received = 0
+            async for chunk in resp.aiter_bytes(FETCH_CHUNK_BYTES):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise AudioTooLargeError("Audio file too large")
+                spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def fetch_audio_object(object_key: str) -> BinaryIO:
+    # Reads straight from the bucket with the server's credentials, so the
+    # bucket does not need to be publicly readable.
+    max_bytes = settings.max_audio_mb * 1024 * 1024
+    size, etag = await asyncio.to_thread(head_object_size, object_key)
+    if size > max_bytes:
+        raise AudioTooLargeError("Audio file too large")
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.audio_spool_memory_bytes)
+    try:
+        await asyncio.to_thread(download_object, object_key, size, etag, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def load_audio(audio_url: str | None, object_key: str | None) -> BinaryIO:
+    if object_key:
+        return await fetch_audio_object(object_key)
+    if not audio_url:
+        raise ValueError("audio_url or object_key is required")
+    return await fetch_audio(audio_url)
+
+
+async def transcribe_and_translate(
+    audio: BinaryIO,
+    source_lang: str,
+    target_lang: str,
+    mime_type: str = "audio/webm",
+    conversation_id: str | None = None,
+) -> tuple[str, str]:
+    upload, upload_mime = audio, mime_type
+    if settings.audio_normalize_enabled:
+        try:
+            upload, upload_mime = await normalize_audio(audio)
+        except AudioNormalizeError:
+            # Fall back to the original recording. Extra input formats are only
+            # accepted while ffmpeg is available, so this is either an allowed
+            # format or one ffmpeg could not read, which the provider rejects too.
+            upload, upload_mime = audio, mime_type
+    try:
+        provider = get_ai_provider("transcribe")
+        translator = get_ai_provider("translate")
+        # One round trip when the same provider handles both tasks and can do
+        # them together; any failure falls back to the two-step path. The
+        # combined call skips the translation cache, and since the transcript
+        # is not known up front it gets the conversation's top glossary terms.
+        if (
+            settings.audio_combined_transcribe_translate
+            and provider is translator
+            and hasattr(provider, "transcribe_translate")
+            and provider.supports_transcribe_translate(source_lang, target_lang)
+        ):
+            glossary = ""
+            if conversation_id:
+                glossary = await conversation_top_glossary(conversation_id, source_lang, target_lang)
+            try:
+                with span("transcribe_translate", provider):
+                    result = await provider.transcribe_translate(
+                        upload, upload_mime, source_lang, target_lang, glossary
+                    )
+            except Exception:
+                pass
+            else:
+                if conversation_id:
+                    glossary_store.note_translation(conversation_id)
+                return result
+        with span("transcribe_audio", provider):
+            transcript = await provider.transcribe_audio(upload, upload_mime, source_lang)
+    finally:
+        if upload is not audio:
+            upload.close()
+    glossary = ""
+    if conversation_id:
+        glossary = await conversation_glossary(conversation_id, transcript, source_lang, target_lang)
+    translated = await cached_translate(translator, transcript, source_lang, target_lang, glossary, conversation_id)
+    return transcript, translated
+
+
+async def _complete_message(message_id: str, transcript: str, translated: str, status: str) -> None:
+    async with AsyncSessionLocal() as db:
+        row = await db.get(Message, message_id)
+        if row is None:
+            return
+        row.transcript_text = transcript
+        row.translated_text = translated
+        row.status = status
+        await db.commit()
+        await db.refresh(row)
+        out = MessageOut.model_validate(row, from_attributes=True)
+    try:
+        await message_broker.publish(out)
+    except Exception:
+        pass
+
+
+async def process_audio_job(payload: dict[str, Any]) -> None:
+    try:
+        audio = await load_audio(payload.get("audio_url"), payload.get("object_key"))
+    except (AudioTooLargeError, AudioObjectMissingError) as exc:
+        raise PermanentJobError(str(exc)) from exc
+    with audio:
+        transcript, translated = await transcribe_and_translate(
+            audio,
+            payload["source_language"],
+            payload["target_language"],
+            payload.get("mime_type", "audio/webm"),
+            payload.get("conversation_id"),
+        )
+    await _complete_message(payload["message_id"], transcript, translated, "ready")
+
+
+async def fail_audio_job(payload: dict[str, Any], error: str) -> None:
+    # Same fail-open contract as the synchronous path: the audio message stays
+    # in the thread with a placeholder transcript.
+    await _complete_message(payload["message_id"], TRANSCRIPTION_UNAVAILABLE, TRANSCRIPTION_UNAVAILABLE, "failed")
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+from typing import BinaryIO
+
+from ..config import settings
+
+AUDIO_EXTENSIONS = {
+    "audio/webm": "webm",
+    "audio/ogg": "ogg",
+    "audio/mpeg": "mp3",
+    "audio/mp4": "m4a",
+    "audio/x-m4a": "m4a",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/flac": "flac",
+}
+
+# codec -> (ffmpeg encoder args, container, output MIME type)
+CODECS = {
+    "opus": (["-c:a", "libopus", "-application", "voip"], "ogg", "audio/ogg"),
+    "mp3": (["-c:a", "libmp3lame"], "mp3", "audio/mpeg"),
+    "flac": (["-c:a", "flac"], "flac", "audio/flac"),
+}
+
+_PIPE_CHUNK_BYTES = 64 * 1024
+
+
+class AudioNormalizeError(RuntimeError):
+    pass
+
+
+def audio_extension(mime_type: str) -> str:
+    return AUDIO_EXTENSIONS.get(mime_type.split(";")[0].strip(), "webm")
+
+
+def ffmpeg_binary() -> str | None:
+    return shutil.which(settings.ffmpeg_path)
+
+
+def normalize_available() -> bool:
+    return settings.audio_normalize_enabled and ffmpeg_binary() is not None
+
+
+def accepted_audio_mime_list() -> list[str]:
+    # A failed transcode sends the original recording to the provider, so the
+    # extra input formats are only offered when ffmpeg can actually run.
+    accepted = settings.allowed_audio_mime_list
+    if normalize_available():
+        accepted += [item for item in settings.audio_normalize_input_mime_list if item not in accepted]
+    return accepted
+
+
+def _silence_filter() -> str:
+    threshold = f"{settings.audio_silence_threshold_db}dB"
+    trim = f"silenceremove=start_periods=1:start_silence=0.1:start_threshold={threshold}"
+    # silenceremove only trims the start reliably, so trailing silence is
+    # trimmed by running it on the reversed signal.
+    return f"{trim},areverse,{trim},areverse"
+
+
+def ffmpeg_command(binary: str) -> list[str]:
+    encoder, container, _ = CODECS[settings.audio_normalize_codec]
+    command = [binary, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", "pipe:0", "-vn"]
+    command += ["-ac", "1", "-ar", str(settings.audio_normalize_sample_rate)]
+    if settings.audio_trim_silence:
+        command += ["-af", _silence_filter()]
+    command += encoder
+    if settings.audio_normalize_codec != "flac":
+        command += ["-b:a", settings.audio_normalize_bitrate]
+    return command + ["-f", container, "pipe:1"]
+
+
+async def _feed(stdin: asyncio.StreamWriter, audio: BinaryIO) -> None:
+    try:
+        while chunk := audio.read(_PIPE_CHUNK_BYTES):
+            stdin.write(chunk)
+            await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg exited early; its return code carries the error.
+        pass
+    finally:
+        stdin.close()
+
+
+async def _drain(stdout: asyncio.StreamReader, output: BinaryIO) -> None:
+    while chunk := await stdout.read(_PIPE_CHUNK_BYTES):
+        output.write(chunk)
+
+
+async def normalize_audio(audio: bytes | BinaryIO) -> tuple[BinaryIO, str]:
+    # Mono, 16 kHz, silence-trimmed and re-encoded at speech bitrate. Audio is
+    # piped through ffmpeg in chunks and the output spooled like downloads, so
+    # neither side is held in memory whole. The caller owns (and must close)
+    # the result.
+    binary = ffmpeg_binary()
+    if binary is None:
+        raise AudioNormalizeError("ffmpeg_unavailable")
+    if settings.audio_normalize_codec not in CODECS:
+        raise AudioNormalizeError(f"unsupported_codec: {settings.audio_normalize_codec}")
+    source = io.BytesIO(audio) if isinstance(audio, bytes) else audio
+    source.seek(0)
+
+    output = tempfile.SpooledTemporaryFile(max_size=settings.audio_spool_memory_bytes)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *ffmpeg_command(binary),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, _, stderr = await asyncio.wait_for(
+                asyncio.gather(_feed(proc.stdin, source), _drain(proc.stdout, output), proc.stderr.read()),
+                timeout=settings.audio_normalize_timeout_seconds,
+            )
+            await proc.wait()
+        except asyncio.TimeoutError as exc:
+            proc.kill()
+            await proc.wait()
+            raise AudioNormalizeError("ffmpeg_timeout") from exc
+        if proc.returncode != 0:
+            raise AudioNormalizeError(f"ffmpeg_failed: {stderr.decode('utf-8', 'replace').strip()[:300]}")
+        output.seek(0, os.SEEK_END)
+        if output.tell() == 0:
+            # Nothing left after trimming (an all-silent recording).
+            raise AudioNormalizeError("ffmpeg_empty_output")
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+    return output, CODECS[settings.audio_normalize_codec][2]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+from ..config import settings
+from .glossary_prompt import glossary_instruction
+from .metrics import detach_request_timings, span
+
+
+def batch_translate_prompt(texts: list[str], source_lang: str, target_lang: str, glossary: str = "") -> str:
+    return (
+        f"Translate each string in the JSON array below from {source_lang} to {target_lang}. "
+        "Preserve meaning and medical terminology. "
+        f"Return only a JSON array of exactly {len(texts)} translated strings, in the same order. "
+        "No markdown. No commentary.\n\n"
+        + glossary_instruction(glossary)
+        + json.dumps(texts, ensure_ascii=False)
+    )
+
+
+def parse_translation_array(raw: str, expected: int) -> list[str]:
+    # Raises ValueError for anything but a same-length array of strings, which
+    # sends the batch down the per-item path.
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("[") :] if "[" in text else text
+    try:
+        parsed: Any = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError("batch_parse_failed") from exc
+    if isinstance(parsed, dict) and len(parsed) == 1:
+        parsed = next(iter(parsed.values()))
+    if not isinstance(parsed, list) or len(parsed) != expected:
+        raise ValueError("batch_length_mismatch")
+    if not all(isinstance(item, str) and item.strip() for item in parsed):
+        raise ValueError("batch_item_invalid")
+    return [item.strip() for item in parsed]
+
+
+class TranslationBatcher:
+    # Concurrent translate calls for the same provider and language pair are
+    # held for a few milliseconds and sent as one prompt.
+    def __init__(self) -> None:
+        self._open: dict[tuple[Any, str, str], list[tuple[str, str, asyncio.Future]]] = {}
+        self._running: set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+
+    async def translate(self, provider: Any, text: str, source_lang: str, target_lang: str, glossary: str = "") -> str:
+        loop = asyncio.get_running_loop()
+        key = (provider, source_lang, target_lang)
+        batch = self._open.get(key)
+        if batch is None:
+            batch = []
+            self._open[key] = batch
+            loop.call_later(settings.translation_batch_window_ms / 1000, self._flush, key, batch)
+        future = loop.create_future()
+        batch.append((text, glossary, future))
+        if (
+            len(batch) >= settings.translation_batch_max_items
+            or sum(len(item) for item, _, _ in batch) >= settings.translation_batch_max_chars
+        ):
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: tuple[Any, str, str], batch: list[tuple[str, str, asyncio.Future]]) -> None:
+        # The window timer and the size limit can both fire for one batch.
+        if self._open.get(key) is not batch:
+            return
+        del self._open[key]
+        task = asyncio.create_task(self._run(*key, batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(
+        self, provider: Any, source_lang: str, target_lang: str, batch: list[tuple[str, str, asyncio.Future]]
+    ) -> None:
+        detach_request_timings()
+        unique = list(dict.fromkeys((text, glossary) for text, glossary, _ in batch))
+        results: dict[tuple[str, str], Any] = {}
+        try:
+            if len(unique) == 1 or not hasattr(provider, "translate_batch"):
+                results = await self._per_item(provider, unique, source_lang, target_lang)
+            else:
+                self.batches += 1
+                self.batched_items += len(unique)
+                # One prompt carries the union of the items' glossary hints;
+                # each hint only names terms that occur in the batch.
+                hints = dict.fromkeys(hint for _, glossary in unique for hint in glossary.split("; ") if hint)
+                try:
+                    with span("translate_batch", provider):
+                        translated = await provider.translate_batch(
+                            [text for text, _ in unique], source_lang, target_lang, "; ".join(hints)
+                        )
+                    results = dict(zip(unique, translated))
+                except ValueError:
+                    self.fallbacks += 1
+                    results = await self._per_item(provider, unique, source_lang, target_lang)
+        except Exception as exc:
+            results = {item: exc for item in unique}
+        for text, glossary, future in batch:
+            if future.done():
+                continue
+            result = results[(text, glossary)]
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _per_item(
+        self, provider: Any, items: list[tuple[str, str]], source_lang: str, target_lang: str
+    ) -> dict[tuple[str, str], Any]:
+        async def translate_one(text: str, glossary: str) -> str:
+            with span("translate", provider):
+                return await provider.translate(text, source_lang, target_lang, glossary)
+
+        translated = await asyncio.gather(
+            *(translate_one(text, glossary) for text, glossary in items),
+            return_exceptions=True,
+        )
+        return dict(zip(items, translated))
+
+    def stats(self) -> dict[str, int]:
+        return {"batches": self.batches, "batched_items": self.batched_items, "fallbacks": self.fallbacks}
+
+
+translation_batcher = TranslationBatcher()
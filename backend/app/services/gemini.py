@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import base64
+import io
 import json
-from typing import Any
+import os
+from typing import Any, AsyncIterator, BinaryIO, Callable
 
 import httpx
 
 from ..config import settings
+from .batching import batch_translate_prompt, parse_translation_array
+from .glossary_prompt import glossary_extraction_prompt, glossary_instruction, parse_glossary_terms
+from .http_client import get_http_client, iter_sse_data, request_timeout
+from .rate_limit import RateLimitedError, estimate_request_tokens, get_governor, retry_after_seconds
+
+# Multiple of 3 so each chunk base64-encodes without padding.
+_INLINE_CHUNK_BYTES = 48 * 1024
+_INLINE_PLACEHOLDER = "__inline_data__"
 
 
 class GeminiProvider:
@@ -14,25 +24,53 @@ class GeminiProvider:
         if not settings.gemini_api_key:
             raise RuntimeError("GEMINI_API_KEY is required")
         self._base = "https://generativelanguage.googleapis.com/v1beta/models"
+        self._governor = get_governor("gemini")
 
-    async def _generate(self, model: str, parts: list[dict[str, Any]]) -> str:
-        url = f"{self._base}/{model}:generateContent?key={settings.gemini_api_key}"
-        payload = {
+    @property
+    def translation_model(self) -> str:
+        return f"gemini:{settings.gemini_translation_model}"
+
+    def _timeout(self) -> httpx.Timeout:
+        return request_timeout(settings.gemini_timeout_seconds)
+
+    def _payload(self, parts: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
             "contents": [{"parts": parts}],
             "generationConfig": {"temperature": 0.2},
         }
-        async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-            try:
-                resp = await client.post(url, json=payload)
-            except httpx.RequestError as exc:
-                raise RuntimeError("gemini_request_failed") from exc
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 429:
-                    raise RuntimeError("gemini_rate_limited") from exc
-                raise RuntimeError(f"gemini_http_{exc.response.status_code}") from exc
-            data = resp.json()
+
+    def _parts_tokens(self, parts: list[dict[str, Any]]) -> int:
+        return estimate_request_tokens(*(part["text"] for part in parts if "text" in part))
+
+    async def _generate(
+        self, model: str, parts: list[dict[str, Any]], task: str = "translate", json_output: bool = False
+    ) -> str:
+        payload = self._payload(parts)
+        if json_output:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        return await self._post_generate(model, task, self._parts_tokens(parts), lambda: {"json": payload})
+
+    async def _post_generate(
+        self, model: str, task: str, tokens: int, request: Callable[[], dict[str, Any]]
+    ) -> str:
+        # request() builds fresh keyword arguments for each attempt, so a
+        # streamed body can be replayed after a 429.
+        return await self._governor.call(task, tokens, lambda: self._post_generate_once(model, **request()))
+
+    async def _post_generate_once(self, model: str, **body: Any) -> str:
+        url = f"{self._base}/{model}:generateContent?key={settings.gemini_api_key}"
+        client = get_http_client()
+        try:
+            resp = await client.post(url, timeout=self._timeout(), **body)
+        except httpx.RequestError as exc:
+            raise RuntimeError("gemini_request_failed") from exc
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 429:
+                raise RateLimitedError("gemini_rate_limited", retry_after_seconds(exc.response)) from exc
+            raise RuntimeError(f"gemini_http_{exc.response.status_code}") from exc
+        data = resp.json()
 
         candidates = data.get("candidates") or []
         if not candidates:
@@ -43,42 +81,154 @@ class GeminiProvider:
             raise RuntimeError("Gemini returned empty text")
         return text.strip()
 
-    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
-        prompt = (
+    async def _generate_stream(
+        self, model: str, parts: list[dict[str, Any]], task: str = "translate"
+    ) -> AsyncIterator[str]:
+        url = f"{self._base}/{model}:streamGenerateContent?alt=sse&key={settings.gemini_api_key}"
+        client = get_http_client()
+        # Streams hold a governor slot for their whole duration and are not retried.
+        try:
+            async with self._governor.slot(task, self._parts_tokens(parts)), client.stream(
+                "POST", url, json=self._payload(parts), timeout=self._timeout()
+            ) as resp:
+                if resp.status_code == 429:
+                    raise RateLimitedError("gemini_rate_limited", retry_after_seconds(resp))
+                if resp.status_code >= 400:
+                    raise RuntimeError(f"gemini_http_{resp.status_code}")
+                async for data in iter_sse_data(resp):
+                    candidates = json.loads(data).get("candidates") or []
+                    if not candidates:
+                        continue
+                    parts_out = candidates[0].get("content", {}).get("parts", [])
+                    text = "".join(part.get("text", "") for part in parts_out if isinstance(part, dict))
+                    if text:
+                        yield text
+        except httpx.RequestError as exc:
+            raise RuntimeError("gemini_request_failed") from exc
+
+    def _translate_prompt(self, text: str, source_lang: str, target_lang: str, glossary: str = "") -> str:
+        return (
             "Translate the following medical conversation text. "
             "Preserve meaning and medical terminology. "
             "Output only the translated text.\n\n"
             f"Source language: {source_lang}\n"
             f"Target language: {target_lang}\n"
-            f"Text: {text}"
+            + glossary_instruction(glossary)
+            + f"Text: {text}"
         )
+
+    async def translate(self, text: str, source_lang: str, target_lang: str, glossary: str = "") -> str:
+        prompt = self._translate_prompt(text, source_lang, target_lang, glossary)
         return await self._generate(settings.gemini_translation_model, [{"text": prompt}])
 
-    async def transcribe_audio(self, audio_bytes: bytes, mime_type: str, language_hint: str) -> str:
+    async def translate_batch(
+        self, texts: list[str], source_lang: str, target_lang: str, glossary: str = ""
+    ) -> list[str]:
+        prompt = batch_translate_prompt(texts, source_lang, target_lang, glossary)
+        raw = await self._generate(settings.gemini_translation_model, [{"text": prompt}], json_output=True)
+        return parse_translation_array(raw, len(texts))
+
+    async def translate_stream(
+        self, text: str, source_lang: str, target_lang: str, glossary: str = ""
+    ) -> AsyncIterator[str]:
+        prompt = self._translate_prompt(text, source_lang, target_lang, glossary)
+        async for delta in self._generate_stream(settings.gemini_translation_model, [{"text": prompt}]):
+            yield delta
+
+    async def _generate_with_audio(
+        self, model: str, prompt: str, audio: bytes | BinaryIO, mime_type: str, json_output: bool = False
+    ) -> str:
+        if isinstance(audio, bytes):
+            audio = io.BytesIO(audio)
+        payload = self._payload(
+            [
+                {"text": prompt},
+                {"inline_data": {"mime_type": mime_type, "data": _INLINE_PLACEHOLDER}},
+            ]
+        )
+        if json_output:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        head, tail = json.dumps(payload).encode("utf-8").split(_INLINE_PLACEHOLDER.encode("ascii"))
+        size = audio.seek(0, os.SEEK_END)
+
+        # The base64 payload is encoded chunk by chunk while the request is
+        # sent, so neither the audio nor its encoding is held in memory whole.
+        async def body() -> AsyncIterator[bytes]:
+            audio.seek(0)
+            yield head
+            while chunk := audio.read(_INLINE_CHUNK_BYTES):
+                yield base64.b64encode(chunk)
+            yield tail
+
+        length = len(head) + 4 * ((size + 2) // 3) + len(tail)
+        headers = {"Content-Type": "application/json", "Content-Length": str(length)}
+        return await self._post_generate(
+            model, "transcribe", self._parts_tokens([{"text": prompt}]), lambda: {"content": body(), "headers": headers}
+        )
+
+    async def transcribe_audio(self, audio: bytes | BinaryIO, mime_type: str, language_hint: str) -> str:
         prompt = (
             "Transcribe this audio accurately for medical conversation context. "
             "Return plain text only with no extra commentary. "
             f"Language hint: {language_hint}."
         )
-        encoded = base64.b64encode(audio_bytes).decode("utf-8")
-        return await self._generate(
-            settings.gemini_transcribe_model,
-            [
-                {"text": prompt},
-                {"inline_data": {"mime_type": mime_type, "data": encoded}},
-            ],
+        return await self._generate_with_audio(settings.gemini_transcribe_model, prompt, audio, mime_type)
+
+    def supports_transcribe_translate(self, source_lang: str, target_lang: str) -> bool:
+        # Limited to the languages listed in AUDIO_COMBINED_LANGUAGES, so the
+        # single call can be enabled per language; the rest transcribe, then translate.
+        languages = settings.audio_combined_language_list
+        return source_lang != target_lang and source_lang in languages and target_lang in languages
+
+    async def transcribe_translate(
+        self, audio: bytes | BinaryIO, mime_type: str, source_lang: str, target_lang: str, glossary: str = ""
+    ) -> tuple[str, str]:
+        prompt = (
+            "Transcribe this audio accurately for medical conversation context, then translate the transcript. "
+            "Preserve meaning and medical terminology. "
+            'Return strict JSON: {"transcript": string, "translation": string}. No markdown. No extra keys.\n\n'
+            + glossary_instruction(glossary)
+            + f"Source language: {source_lang}\n"
+            f"Target language: {target_lang}"
         )
+        raw = await self._generate_with_audio(settings.gemini_transcribe_model, prompt, audio, mime_type, json_output=True)
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError("gemini_transcribe_translate_parse_failed") from exc
+        transcript = str(parsed.get("transcript", "")).strip() if isinstance(parsed, dict) else ""
+        translation = str(parsed.get("translation", "")).strip() if isinstance(parsed, dict) else ""
+        if not transcript or not translation:
+            raise RuntimeError("gemini_transcribe_translate_incomplete")
+        return transcript, translation
+
+    async def extract_glossary(
+        self, pairs: list[tuple[str, str]], source_lang: str, target_lang: str
+    ) -> list[dict[str, Any]]:
+        prompt = glossary_extraction_prompt(pairs, source_lang, target_lang)
+        raw = await self._generate(settings.gemini_summary_model, [{"text": prompt}], task="summarize", json_output=True)
+        return parse_glossary_terms(raw)
 
-    async def summarize_medical(self, lines: list[str], style: str) -> dict[str, Any]:
+    async def summarize_medical(
+        self, lines: list[str], style: str, previous: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        context = ""
+        if previous is not None:
+            context = (
+                "Previous summary JSON (update it with the new lines; keep items that still apply):\n"
+                f"{json.dumps(previous, ensure_ascii=False)}\n"
+                "New lines only.\n"
+            )
         prompt = (
             "You are summarizing a doctor-patient conversation. "
             "Return strict JSON with keys: summary (string), symptoms (array), diagnoses (array), medications (array), follow_up (array). "
             "No markdown. No extra keys.\n\n"
             f"Style: {style}\n"
-            "Conversation:\n"
+            + context
+            + "Conversation:\n"
             + "\n".join(lines)
         )
-        raw = await self._generate(settings.gemini_summary_model, [{"text": prompt}])
+        raw = await self._generate(settings.gemini_summary_model, [{"text": prompt}], task="summarize")
         try:
             parsed = json.loads(raw)
         except json.JSONDecodeError as exc:
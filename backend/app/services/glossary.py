@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models import Conversation, GlossaryTerm, Message, now_utc
+from .jobs import job_queue
+from .metrics import span
+from .provider_factory import get_ai_provider
+
+# (source_language, source_term, target_language, target_term)
+GlossaryEntry = tuple[str, str, str, str]
+
+MAX_TERM_CHARS = 80
+
+
+def clean_terms(items: list[Any]) -> list[tuple[str, str]]:
+    terms: dict[str, tuple[str, str]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        source = " ".join(str(item.get("source", "")).split())
+        target = " ".join(str(item.get("target", "")).split())
+        if not source or not target or len(source) > MAX_TERM_CHARS or len(target) > MAX_TERM_CHARS:
+            continue
+        # Terms spelled the same in both languages (most drug names) need no hint.
+        if source.casefold() == target.casefold():
+            continue
+        terms.setdefault(source.casefold(), (source, target))
+    return list(terms.values())[: settings.glossary_max_terms]
+
+
+def _directed(entries: list[GlossaryEntry], source_lang: str, target_lang: str) -> Iterator[tuple[str, str]]:
+    # Entries are stored in one direction and applied in both.
+    for lang_a, term_a, lang_b, term_b in entries:
+        if (lang_a, lang_b) == (source_lang, target_lang):
+            yield term_a, term_b
+        elif (lang_b, lang_a) == (source_lang, target_lang):
+            yield term_b, term_a
+
+
+def format_glossary(entries: list[GlossaryEntry], text: str, source_lang: str, target_lang: str) -> str:
+    # Only terms that occur in the text are sent, so the prompt grows by a few
+    # tokens at most. Whole words only, so "pain" is not hinted inside "painting".
+    folded = " ".join(text.split()).casefold()
+    hints: list[str] = []
+    for source, target in _directed(entries, source_lang, target_lang):
+        if re.search(rf"(?<!\w){re.escape(source.casefold())}(?!\w)", folded):
+            hints.append(f"{source}={target}")
+            if len(hints) >= settings.glossary_prompt_terms:
+                break
+    return "; ".join(hints)
+
+
+def top_glossary(entries: list[GlossaryEntry], source_lang: str, target_lang: str) -> str:
+    # For prompts written before the text is known (audio); entries are
+    # already ordered by how often they were extracted.
+    hints = [f"{source}={target}" for source, target in _directed(entries, source_lang, target_lang)]
+    return "; ".join(hints[: settings.glossary_prompt_terms])
+
+
+class GlossaryStore:
+    # Per-conversation glossaries, loaded from the database on first use and
+    # held for a few minutes; a refresh job drops the stale copy.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, list[GlossaryEntry]]] = OrderedDict()
+        self._since_refresh: OrderedDict[str, int] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _cached(self, conversation_id: str) -> list[GlossaryEntry] | None:
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(conversation_id)
+            return entry[1]
+
+    def _put(self, conversation_id: str, entries: list[GlossaryEntry]) -> None:
+        with self._lock:
+            self._entries[conversation_id] = (time.monotonic() + settings.glossary_cache_ttl_seconds, entries)
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > settings.glossary_cache_max_conversations:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, conversation_id: str) -> None:
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+
+    async def entries(self, conversation_id: str) -> list[GlossaryEntry]:
+        cached = self._cached(conversation_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.scalars(
+                    select(GlossaryTerm)
+                    .where(GlossaryTerm.conversation_id == conversation_id)
+                    .order_by(GlossaryTerm.occurrences.desc(), GlossaryTerm.updated_at.desc())
+                )
+            ).all()
+        entries = [(row.source_language, row.source_term, row.target_language, row.target_term) for row in rows]
+        self._put(conversation_id, entries)
+        return entries
+
+    def note_translation(self, conversation_id: str) -> None:
+        # Called for provider translations only; cache hits add no new wording.
+        if not settings.glossary_enabled:
+            return
+        with self._lock:
+            count = self._since_refresh.pop(conversation_id, 0) + 1
+            due = count >= settings.glossary_refresh_every
+            self._since_refresh[conversation_id] = 0 if due else count
+            while len(self._since_refresh) > settings.glossary_cache_max_conversations:
+                self._since_refresh.popitem(last=False)
+        if due:
+            task = asyncio.create_task(self._enqueue_refresh(conversation_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _enqueue_refresh(self, conversation_id: str) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                job_queue.enqueue(db, "glossary_refresh", {"conversation_id": conversation_id})
+                await db.commit()
+        except Exception:
+            return
+        self.refreshes += 1
+        job_queue.notify()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            size = len(self._entries)
+        return {"conversations": size, "hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
+
+
+glossary_store = GlossaryStore()
+
+
+async def conversation_glossary(conversation_id: str, text: str, source_lang: str, target_lang: str) -> str:
+    if not settings.glossary_enabled:
+        return ""
+    try:
+        entries = await glossary_store.entries(conversation_id)
+    except Exception:
+        # The glossary only makes wording consistent; never fail a translation on it.
+        return ""
+    return format_glossary(entries, text, source_lang, target_lang)
+
+
+async def conversation_top_glossary(conversation_id: str, source_lang: str, target_lang: str) -> str:
+    if not settings.glossary_enabled:
+        return ""
+    try:
+        entries = await glossary_store.entries(conversation_id)
+    except Exception:
+        return ""
+    return top_glossary(entries, source_lang, target_lang)
+
+
+def _message_pairs(rows: list[Message], lang_a: str, lang_b: str) -> list[tuple[str, str]]:
+    pairs: list[tuple[str, str]] = []
+    for row in rows:
+        original = row.original_text or row.transcript_text
+        translated = row.translated_text
+        # Fail-open messages carry the original (or a placeholder) as translation.
+        if not original or not translated or original.strip() == translated.strip():
+            continue
+        if (row.source_language, row.target_language) == (lang_a, lang_b):
+            pairs.append((original, translated))
+        elif (row.source_language, row.target_language) == (lang_b, lang_a):
+            pairs.append((translated, original))
+    return pairs
+
+
+async def refresh_glossary(payload: dict[str, Any]) -> None:
+    conversation_id = payload["conversation_id"]
+    async with AsyncSessionLocal() as db:
+        conversation = await db.get(Conversation, conversation_id)
+        if conversation is None or conversation.doctor_language == conversation.patient_language:
+            return
+        lang_a, lang_b = conversation.doctor_language, conversation.patient_language
+        rows = (
+            await db.scalars(
+                select(Message)
+                .where(Message.conversation_id == conversation_id, Message.translated_text.is_not(None))
+                .order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(settings.glossary_source_messages)
+            )
+        ).all()
+        pairs = _message_pairs(list(reversed(rows)), lang_a, lang_b)
+        if not pairs:
+            return
+
+        # Extraction runs in the background on the summary model, so the
+        # per-message translate calls can stay on the small, fast model.
+        provider = get_ai_provider("summarize")
+        if not hasattr(provider, "extract_glossary"):
+            return
+        with span("extract_glossary", provider):
+            extracted = await provider.extract_glossary(pairs, lang_a, lang_b)
+        terms = clean_terms(extracted)
+        if not terms:
+            return
+
+        existing = {
+            row.source_term.casefold(): row
+            for row in (
+                await db.scalars(
+                    select(GlossaryTerm).where(
+                        GlossaryTerm.conversation_id == conversation_id,
+                        GlossaryTerm.source_language == lang_a,
+                        GlossaryTerm.target_language == lang_b,
+                    )
+                )
+            ).all()
+        }
+        for source, target in terms:
+            row = existing.get(source.casefold())
+            if row is None:
+                row = GlossaryTerm(
+                    conversation_id=conversation_id,
+                    source_language=lang_a,
+                    target_language=lang_b,
+                    source_term=source,
+                    target_term=target,
+                )
+                db.add(row)
+                existing[source.casefold()] = row
+                continue
+            row.target_term = target
+            row.occurrences += 1
+            row.updated_at = now_utc()
+
+        # Keep the terms seen most often, preferring the ones just extracted.
+        fresh = {source.casefold() for source, _ in terms}
+        ranked = sorted(
+            existing.values(),
+            key=lambda row: (row.occurrences or 1, row.source_term.casefold() in fresh),
+            reverse=True,
+        )
+        await db.flush()
+        for row in ranked[settings.glossary_max_terms :]:
+            await db.delete(row)
+        await db.commit()
+    glossary_store.invalidate(conversation_id)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+def glossary_instruction(glossary: str) -> str:
+    if not glossary:
+        return ""
+    return f"Use these established translations for recurring terms: {glossary}\n"
+
+
+def glossary_extraction_prompt(pairs: list[tuple[str, str]], source_lang: str, target_lang: str) -> str:
+    lines = "\n".join(
+        json.dumps({"source": source, "target": target}, ensure_ascii=False) for source, target in pairs
+    )
+    return (
+        f"Below are {source_lang} -> {target_lang} translation pairs from one doctor-patient conversation. "
+        "Extract the medical and clinical terms (symptoms, conditions, body parts, medications, procedures, "
+        "dosages) together with the exact wording the translations used for them. "
+        'Return strict JSON: {"terms": [{"source": "...", "target": "..."}]}. '
+        "Short noun phrases only. No markdown.\n\n"
+        + lines
+    )
+
+
+def parse_glossary_terms(raw: str) -> list[dict[str, Any]]:
+    try:
+        parsed: Any = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise ValueError("glossary_parse_failed") from exc
+    if isinstance(parsed, dict):
+        parsed = parsed.get("terms", [])
+    if not isinstance(parsed, list):
+        raise ValueError("glossary_parse_failed")
+    return [item for item in parsed if isinstance(item, dict)]
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, AsyncIterator, BinaryIO
 
 import httpx
 
 from ..config import settings
+from .audio_normalize import audio_extension
+from .batching import batch_translate_prompt, parse_translation_array
+from .glossary_prompt import glossary_extraction_prompt, glossary_instruction, parse_glossary_terms
+from .http_client import get_http_client, iter_sse_data, request_timeout
+from .rate_limit import RateLimitedError, estimate_request_tokens, get_governor, retry_after_seconds
 
 
 class GroqProvider:
@@ -13,15 +18,22 @@ class GroqProvider:
         if not settings.groq_api_key:
             raise RuntimeError("GROQ_API_KEY is required")
         self._base = "https://api.groq.com/openai/v1"
+        self._governor = get_governor("groq")
+
+    @property
+    def translation_model(self) -> str:
+        return f"groq:{settings.groq_translation_model}"
+
+    def _timeout(self) -> httpx.Timeout:
+        return request_timeout(settings.groq_timeout_seconds)
 
     def _headers(self) -> dict[str, str]:
         return {
             "Authorization": f"Bearer {settings.groq_api_key}",
         }
 
-    async def _chat(self, model: str, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
-        url = f"{self._base}/chat/completions"
-        payload = {
+    def _chat_payload(self, model: str, system_prompt: str, user_prompt: str, temperature: float) -> dict[str, Any]:
+        return {
             "model": model,
             "temperature": temperature,
             "messages": [
@@ -29,18 +41,30 @@ class GroqProvider:
                 {"role": "user", "content": user_prompt},
             ],
         }
-        async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-            try:
-                resp = await client.post(url, headers=self._headers(), json=payload)
-            except httpx.RequestError as exc:
-                raise RuntimeError("groq_request_failed") from exc
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 429:
-                    raise RuntimeError("groq_rate_limited") from exc
-                raise RuntimeError(f"groq_http_{exc.response.status_code}") from exc
-            data = resp.json()
+
+    async def _chat(
+        self, model: str, system_prompt: str, user_prompt: str, temperature: float = 0.2, task: str = "translate"
+    ) -> str:
+        tokens = estimate_request_tokens(system_prompt, user_prompt)
+        return await self._governor.call(
+            task, tokens, lambda: self._chat_once(model, system_prompt, user_prompt, temperature)
+        )
+
+    async def _chat_once(self, model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+        url = f"{self._base}/chat/completions"
+        payload = self._chat_payload(model, system_prompt, user_prompt, temperature)
+        client = get_http_client()
+        try:
+            resp = await client.post(url, headers=self._headers(), json=payload, timeout=self._timeout())
+        except httpx.RequestError as exc:
+            raise RuntimeError("groq_request_failed") from exc
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 429:
+                raise RateLimitedError("groq_rate_limited", retry_after_seconds(exc.response)) from exc
+            raise RuntimeError(f"groq_http_{exc.response.status_code}") from exc
+        data = resp.json()
 
         choices = data.get("choices") or []
         if not choices:
@@ -50,46 +74,139 @@ class GroqProvider:
             raise RuntimeError("groq_empty_response")
         return content.strip()
 
-    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def _chat_stream(
+        self, model: str, system_prompt: str, user_prompt: str, temperature: float = 0.2, task: str = "translate"
+    ) -> AsyncIterator[str]:
+        url = f"{self._base}/chat/completions"
+        payload = {**self._chat_payload(model, system_prompt, user_prompt, temperature), "stream": True}
+        client = get_http_client()
+        tokens = estimate_request_tokens(system_prompt, user_prompt)
+        # Streams hold a governor slot for their whole duration and are not
+        # retried: callers already fall back once partial output was shown.
+        try:
+            async with self._governor.slot(task, tokens), client.stream(
+                "POST", url, headers=self._headers(), json=payload, timeout=self._timeout()
+            ) as resp:
+                if resp.status_code == 429:
+                    raise RateLimitedError("groq_rate_limited", retry_after_seconds(resp))
+                if resp.status_code >= 400:
+                    raise RuntimeError(f"groq_http_{resp.status_code}")
+                async for data in iter_sse_data(resp):
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+        except httpx.RequestError as exc:
+            raise RuntimeError("groq_request_failed") from exc
+
+    def _translate_prompts(
+        self, text: str, source_lang: str, target_lang: str, glossary: str = ""
+    ) -> tuple[str, str]:
+        system_prompt = "You are a medical translator. Preserve meaning and medical terminology."
+        user_prompt = (
+            f"Translate from {source_lang} to {target_lang}. "
+            "Return only translated text.\n\n"
+            + glossary_instruction(glossary)
+            + f"Text: {text}"
+        )
+        return system_prompt, user_prompt
+
+    async def translate(self, text: str, source_lang: str, target_lang: str, glossary: str = "") -> str:
+        system_prompt, user_prompt = self._translate_prompts(text, source_lang, target_lang, glossary)
         return await self._chat(
+            model=settings.groq_translation_model,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=0.0,
+        )
+
+    async def translate_batch(
+        self, texts: list[str], source_lang: str, target_lang: str, glossary: str = ""
+    ) -> list[str]:
+        raw = await self._chat(
             model=settings.groq_translation_model,
             system_prompt="You are a medical translator. Preserve meaning and medical terminology.",
-            user_prompt=(
-                f"Translate from {source_lang} to {target_lang}. "
-                "Return only translated text.\n\n"
-                f"Text: {text}"
-            ),
+            user_prompt=batch_translate_prompt(texts, source_lang, target_lang, glossary),
             temperature=0.0,
         )
+        return parse_translation_array(raw, len(texts))
 
-    async def transcribe_audio(self, audio_bytes: bytes, mime_type: str, language_hint: str) -> str:
-        url = f"{self._base}/audio/transcriptions"
+    async def translate_stream(
+        self, text: str, source_lang: str, target_lang: str, glossary: str = ""
+    ) -> AsyncIterator[str]:
+        system_prompt, user_prompt = self._translate_prompts(text, source_lang, target_lang, glossary)
+        async for delta in self._chat_stream(
+            model=settings.groq_translation_model,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=0.0,
+        ):
+            yield delta
+
+    async def _audio_request(self, endpoint: str, audio: bytes | BinaryIO, mime_type: str, data: dict[str, str]) -> str:
+        return await self._governor.call(
+            "transcribe", 0, lambda: self._audio_request_once(endpoint, audio, mime_type, data)
+        )
+
+    async def _audio_request_once(
+        self, endpoint: str, audio: bytes | BinaryIO, mime_type: str, data: dict[str, str]
+    ) -> str:
+        url = f"{self._base}/audio/{endpoint}"
+        if not isinstance(audio, bytes):
+            audio.seek(0)
+        # httpx streams file objects into the multipart body in small chunks.
         files = {
-            "file": ("audio.webm", audio_bytes, mime_type),
+            "file": (f"audio.{audio_extension(mime_type)}", audio, mime_type),
         }
+        client = get_http_client()
+        try:
+            resp = await client.post(url, headers=self._headers(), data=data, files=files, timeout=self._timeout())
+        except httpx.RequestError as exc:
+            raise RuntimeError("groq_request_failed") from exc
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 429:
+                raise RateLimitedError("groq_rate_limited", retry_after_seconds(exc.response)) from exc
+            raise RuntimeError(f"groq_http_{exc.response.status_code}") from exc
+        payload = resp.json()
+        text = str(payload.get("text", "")).strip()
+        if not text:
+            raise RuntimeError("groq_empty_transcript")
+        return text
+
+    async def transcribe_audio(self, audio: bytes | BinaryIO, mime_type: str, language_hint: str) -> str:
         data = {
             "model": settings.groq_transcribe_model,
             "language": language_hint,
             "response_format": "verbose_json",
         }
-        async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-            try:
-                resp = await client.post(url, headers=self._headers(), data=data, files=files)
-            except httpx.RequestError as exc:
-                raise RuntimeError("groq_request_failed") from exc
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 429:
-                    raise RuntimeError("groq_rate_limited") from exc
-                raise RuntimeError(f"groq_http_{exc.response.status_code}") from exc
-            payload = resp.json()
-        text = str(payload.get("text", "")).strip()
-        if not text:
-            raise RuntimeError("groq_empty_transcript")
-        return text
+        return await self._audio_request("transcriptions", audio, mime_type, data)
+
+    async def extract_glossary(
+        self, pairs: list[tuple[str, str]], source_lang: str, target_lang: str
+    ) -> list[dict[str, Any]]:
+        raw = await self._chat(
+            model=settings.groq_summary_model,
+            system_prompt="You build medical terminology glossaries and return strict JSON only.",
+            user_prompt=glossary_extraction_prompt(pairs, source_lang, target_lang),
+            temperature=0.0,
+            task="summarize",
+        )
+        return parse_glossary_terms(raw)
 
-    async def summarize_medical(self, lines: list[str], style: str) -> dict[str, Any]:
+    async def summarize_medical(
+        self, lines: list[str], style: str, previous: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        context = ""
+        if previous is not None:
+            context = (
+                "Previous summary JSON (update it with the new lines; keep items that still apply):\n"
+                f"{json.dumps(previous, ensure_ascii=False)}\n"
+                "New lines only.\n"
+            )
         raw = await self._chat(
             model=settings.groq_summary_model,
             system_prompt="You summarize clinical conversations and return strict JSON only.",
@@ -97,10 +214,12 @@ class GroqProvider:
                 "Return strict JSON with keys: summary (string), symptoms (array), diagnoses (array), "
                 "medications (array), follow_up (array). No markdown.\n\n"
                 f"Style: {style}\n"
-                "Conversation:\n"
+                + context
+                + "Conversation:\n"
                 + "\n".join(lines)
             ),
             temperature=0.1,
+            task="summarize",
         )
         try:
             parsed = json.loads(raw)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import importlib.util
+from typing import AsyncIterator
+
+import httpx
+
+from ..config import settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_supported() -> bool:
+    return settings.http_http2 and importlib.util.find_spec("h2") is not None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=request_timeout(settings.ai_timeout_seconds),
+        http2=_http2_supported(),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def request_timeout(seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(seconds or settings.ai_timeout_seconds, connect=settings.http_connect_timeout_seconds)
+
+
+async def iter_sse_data(resp: httpx.Response) -> AsyncIterator[str]:
+    lines: list[str] = []
+    async for line in resp.aiter_lines():
+        if not line:
+            if lines:
+                yield "\n".join(lines)
+                lines = []
+            continue
+        if line.startswith("data:"):
+            lines.append(line[5:].lstrip())
+    if lines:
+        yield "\n".join(lines)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models import Job, now_utc
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[dict[str, Any], str], Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self) -> None:
+        self._handlers: dict[str, tuple[JobHandler, FailureHandler | None]] = {}
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._last_prune = 0.0
+
+    def register(self, kind: str, handler: JobHandler, on_failure: FailureHandler | None = None) -> None:
+        self._handlers[kind] = (handler, on_failure)
+
+    def enqueue(self, db: AsyncSession, kind: str, payload: dict[str, Any]) -> Job:
+        # The job is written in the caller's transaction, so it is durable
+        # exactly when the rows it refers to are.
+        job = Job(kind=kind, payload=payload, max_attempts=settings.job_max_attempts)
+        db.add(job)
+        return job
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def start(self) -> None:
+        # Jobs left running by a crashed worker are not reset here: other
+        # workers may still own them. _claim takes them over once their lease
+        # (updated_at, renewed by the owner's heartbeat) has expired.
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(settings.job_workers, 0))]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def pending_count(self) -> int:
+        async with AsyncSessionLocal() as db:
+            count = await db.scalar(select(func.count()).select_from(Job).where(Job.status.in_(("pending", "running"))))
+            return int(count or 0)
+
+    def _claimable(self) -> Any:
+        expired = now_utc() - timedelta(seconds=settings.job_lease_seconds)
+        return or_(
+            and_(Job.status == "pending", Job.run_after <= now_utc()),
+            and_(Job.status == "running", Job.updated_at < expired),
+        )
+
+    async def _claim(self) -> Job | None:
+        async with AsyncSessionLocal() as db:
+            candidates = (
+                await db.scalars(select(Job.id).where(self._claimable()).order_by(Job.run_after.asc()).limit(5))
+            ).all()
+            for job_id in candidates:
+                result = await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, self._claimable())
+                    .values(status="running", attempts=Job.attempts + 1, updated_at=now_utc())
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    return await db.get(Job, job_id)
+        return None
+
+    async def _finish(self, job_id: str, **values: Any) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == job_id).values(updated_at=now_utc(), **values))
+            await db.commit()
+
+    async def _prune(self) -> None:
+        # Finished jobs are kept for a while for inspection, then deleted so
+        # the table (and the claim scan) stays small. Failed ones are kept longer.
+        if time.monotonic() - self._last_prune < settings.job_prune_interval_seconds:
+            return
+        self._last_prune = time.monotonic()
+        now = now_utc()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(Job).where(
+                    or_(
+                        and_(
+                            Job.status == "done",
+                            Job.updated_at < now - timedelta(seconds=settings.job_done_retention_seconds),
+                        ),
+                        and_(
+                            Job.status == "failed",
+                            Job.updated_at < now - timedelta(seconds=settings.job_failed_retention_seconds),
+                        ),
+                    )
+                )
+            )
+            await db.commit()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        # Renews the lease while the handler runs, so long transcriptions are
+        # not taken over by another worker.
+        while True:
+            await asyncio.sleep(settings.job_lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Job).where(Job.id == job_id, Job.status == "running").values(updated_at=now_utc())
+                    )
+                    await db.commit()
+            except Exception:
+                continue
+
+    async def _run(self, job: Job) -> None:
+        handler, on_failure = self._handlers.get(job.kind, (None, None))
+        if handler is None:
+            await self._finish(job.id, status="failed", last_error=f"unknown job kind: {job.kind}")
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            await handler(job.payload)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:1000]
+            if isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts:
+                await self._finish(job.id, status="failed", last_error=error)
+                if on_failure is not None:
+                    await on_failure(job.payload, error)
+                return
+            delay = settings.job_retry_base_seconds * 2 ** (job.attempts - 1)
+            await self._finish(
+                job.id, status="pending", last_error=error, run_after=now_utc() + timedelta(seconds=delay)
+            )
+            return
+        finally:
+            heartbeat.cancel()
+        await self._finish(job.id, status="done", last_error=None)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                job = None
+            if job is None:
+                # Clear only after finding nothing, so a notify() meant for
+                # another worker is not swallowed; one that arrived during the
+                # claim is answered with another claim before waiting.
+                if self._wake.is_set():
+                    self._wake.clear()
+                    continue
+                try:
+                    await self._prune()
+                except Exception:
+                    pass
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=settings.job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception:
+                # Bookkeeping failed (e.g. DB unavailable); the job stays
+                # "running" and is claimed again once its lease expires.
+                continue
+
+
+job_queue = JobQueue()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import deque
+from typing import Any
+
+# Upper bounds in seconds; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+_RECENT_SAMPLES = 200
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum_seconds = 0.0
+        self.errors = 0
+        self._recent: deque[float] = deque(maxlen=_RECENT_SAMPLES)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += 1
+            self.sum_seconds += seconds
+            self._recent.append(seconds)
+
+    def error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float | None:
+        # From the recent window rather than the buckets, so hedge delays
+        # follow the provider's current behavior.
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+    @property
+    def recent_count(self) -> int:
+        return len(self._recent)
+
+    def cumulative(self) -> tuple[list[tuple[float, int]], int, float, int]:
+        # (upper bound, cumulative count) pairs ending with +Inf, then count, sum and errors.
+        with self._lock:
+            running = 0
+            buckets: list[tuple[float, int]] = []
+            for bound, count in zip([*self.buckets, float("inf")], self.counts):
+                running += count
+                buckets.append((bound, running))
+            return buckets, self.total, self.sum_seconds, self.errors
+
+    def snapshot(self) -> dict[str, Any]:
+        buckets, total, sum_seconds, errors = self.cumulative()
+        data: dict[str, Any] = {
+            "count": total,
+            "sum_seconds": round(sum_seconds, 6),
+            "errors": errors,
+            "buckets": {"+Inf" if bound == float("inf") else str(bound): count for bound, count in buckets},
+        }
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        data["p50_seconds"] = round(p50, 6) if p50 is not None else None
+        data["p95_seconds"] = round(p95, 6) if p95 is not None else None
+        return data
+
+
+_histograms: dict[tuple[str, str], LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def latency_histogram(provider: str, task: str) -> LatencyHistogram:
+    key = (provider, task)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, LatencyHistogram())
+    return histogram
+
+
+def latency_histograms() -> list[tuple[str, str, LatencyHistogram]]:
+    return [(provider, task, histogram) for (provider, task), histogram in sorted(_histograms.items())]
+
+
+def latency_metrics() -> dict[str, dict[str, Any]]:
+    data: dict[str, dict[str, Any]] = {}
+    for (provider, task), histogram in sorted(_histograms.items()):
+        data.setdefault(provider, {})[task] = histogram.snapshot()
+    return data
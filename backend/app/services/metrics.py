@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+from .latency import LatencyHistogram, latency_histograms
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SPAN_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 60.0)
+
+STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK"}
+
+# Seconds spent in the database and in provider calls by the current request,
+# so a slow request can be split into DB / provider / everything else.
+_request_timings: ContextVar[dict[str, float] | None] = ContextVar("request_timings", default=None)
+
+_histograms: dict[tuple[str, tuple[tuple[str, str], ...]], LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+_phase_seconds: dict[tuple[str, str], float] = {}
+_in_flight = 0
+
+
+def _histogram(name: str, buckets: tuple[float, ...], **labels: str) -> LatencyHistogram:
+    key = (name, tuple(sorted(labels.items())))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, LatencyHistogram(buckets))
+    return histogram
+
+
+def add_request_time(phase: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+def detach_request_timings() -> None:
+    # For tasks spawned on behalf of several requests (e.g. a translation
+    # batch): their callers account for the time themselves.
+    _request_timings.set(None)
+
+
+def provider_label(provider: Any) -> str:
+    name = type(provider).__name__
+    return name.removesuffix("Provider").lower() or name
+
+
+@contextmanager
+def span(operation: str, provider: Any = None) -> Iterator[None]:
+    histogram = _histogram(
+        "provider_call_duration_seconds",
+        SPAN_BUCKETS,
+        operation=operation,
+        provider=provider_label(provider) if provider is not None else "",
+    )
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        histogram.error()
+        raise
+    else:
+        histogram.observe(time.perf_counter() - started)
+    finally:
+        # Concurrent calls within one request (e.g. summary windows) add up.
+        add_request_time("provider", time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    words = statement.split(None, 1)
+    kind = words[0].upper() if words else ""
+    statement_kind = kind if kind in STATEMENT_KINDS else "OTHER"
+    _histogram("db_query_duration_seconds", DB_BUCKETS, statement=statement_kind).observe(elapsed)
+    add_request_time("db", elapsed)
+
+
+def _handle_error(context) -> None:
+    conn = context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started:
+        elapsed = time.perf_counter() - started.pop()
+        _histogram("db_query_duration_seconds", DB_BUCKETS, statement="ERROR").error()
+        add_request_time("db", elapsed)
+
+
+def instrument_engine(target: Engine) -> None:
+    if event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
+
+
+def _server_timing(timings: dict[str, float], started: float) -> bytes:
+    total = time.perf_counter() - started
+    parts = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in sorted(timings.items())]
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: no extra task or body
+    # buffering per request, and streaming responses pass straight through.
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        global _in_flight
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict[str, float] = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.metrics_server_timing:
+                    headers = [*message.get("headers", []), (b"server-timing", _server_timing(timings, started))]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _in_flight -= 1
+            elapsed = time.perf_counter() - started
+            _request_timings.reset(token)
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            _histogram(
+                "http_request_duration_seconds",
+                HTTP_BUCKETS,
+                method=scope["method"],
+                route=route,
+                status=str(status),
+            ).observe(elapsed)
+            other = elapsed
+            for phase, seconds in timings.items():
+                _phase_seconds[(route, phase)] = _phase_seconds.get((route, phase), 0.0) + seconds
+                other -= seconds
+            _phase_seconds[(route, "other")] = _phase_seconds.get((route, "other"), 0.0) + max(other, 0.0)
+
+
+# Snapshot values that only ever grow are exported as counters.
+COUNTER_KEYS = {
+    "hits",
+    "persistent_hits",
+    "misses",
+    "evictions",
+    "batches",
+    "batched_items",
+    "fallbacks",
+    "refreshes",
+    "connects",
+    "checkouts",
+    "timeouts",
+    "wait_seconds_total",
+    "admitted",
+    "throttled",
+    "queue_timeouts",
+    "hedges",
+    "hedge_wins",
+    "times_opened",
+}
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def sample(
+        self, name: str, value: float, labels: dict[str, str] | None = None, kind: str = "gauge", help_text: str = ""
+    ) -> None:
+        if kind == "counter" and not name.endswith("_total"):
+            name = f"{name}_total"
+        full = f"{self.prefix}_{name}"
+        family = self._families.setdefault(full, (kind, help_text, []))
+        family[2].append(self._line(full, labels or {}, value))
+
+    def _line(self, name: str, labels: dict[str, str], value: float) -> str:
+        if labels:
+            rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            return f"{name}{{{rendered}}} {_format_value(value)}"
+        return f"{name} {_format_value(value)}"
+
+    def histogram(
+        self, name: str, histogram: LatencyHistogram, labels: dict[str, str], help_text: str = "", errors: bool = True
+    ) -> None:
+        full = f"{self.prefix}_{name}"
+        family = self._families.setdefault(full, ("histogram", help_text, []))
+        buckets, total, sum_seconds, error_count = histogram.cumulative()
+        for bound, count in buckets:
+            family[2].append(self._line(f"{full}_bucket", {**labels, "le": _format_value(bound)}, count))
+        family[2].append(self._line(f"{full}_sum", labels, sum_seconds))
+        family[2].append(self._line(f"{full}_count", labels, total))
+        if errors:
+            self.sample(f"{name.removesuffix('_duration_seconds')}_errors", error_count, labels, kind="counter")
+
+    def stats(self, name: str, data: dict[str, Any], labels: dict[str, str] | None = None) -> None:
+        for key, value in data.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                self.sample(f"{name}_{key}", value, labels, kind="counter" if key in COUNTER_KEYS else "gauge")
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, (kind, help_text, samples) in self._families.items():
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def render_prometheus(stats: dict[str, Any]) -> str:
+    out = _Exposition(settings.metrics_prefix)
+
+    out.sample("http_requests_in_flight", _in_flight, help_text="HTTP requests being served.")
+    histogram_help = {
+        "http_request_duration_seconds": "HTTP request latency by route template.",
+        "db_query_duration_seconds": "Database statement latency.",
+        "provider_call_duration_seconds": "AI provider call latency as seen by the caller (including queueing).",
+    }
+    with _histograms_lock:
+        histograms = sorted(_histograms.items())
+    for (name, labels), histogram in histograms:
+        out.histogram(
+            name, histogram, dict(labels), histogram_help.get(name, ""), errors=name != "http_request_duration_seconds"
+        )
+    for (route, phase), seconds in sorted(_phase_seconds.items()):
+        out.sample(
+            "http_request_phase_seconds",
+            seconds,
+            {"route": route, "phase": phase},
+            kind="counter",
+            help_text="Request time split into db, provider and other (serialization, framework).",
+        )
+    for provider, task, histogram in latency_histograms():
+        out.histogram(
+            "provider_request_duration_seconds",
+            histogram,
+            {"provider": provider, "task": task},
+            "Provider HTTP request latency inside the rate governor.",
+        )
+
+    out.stats("translation_cache", stats.get("translation_cache", {}))
+    out.stats("translation_batches", stats.get("translation_batches", {}))
+    out.stats("glossary", stats.get("glossary", {}))
+    if "subscribers" in stats:
+        out.sample("subscribers", stats["subscribers"], help_text="Live message subscribers.")
+    for pool, data in stats.get("db_pool", {}).items():
+        out.stats("db_pool", data, {"pool": pool})
+    for provider, data in stats.get("rate_limits", {}).items():
+        out.stats("rate_limit", data, {"provider": provider})
+        for key in ("queue_depth", "wait_seconds_total", "wait_seconds_max"):
+            for task, value in (data.get(key) or {}).items():
+                out.sample(
+                    f"rate_limit_{key}",
+                    value,
+                    {"provider": provider, "task": task},
+                    kind="counter" if key in COUNTER_KEYS else "gauge",
+                )
+    routing = stats.get("routing", {})
+    out.stats("routing", routing)
+    for provider, data in routing.get("circuits", {}).items():
+        out.stats("circuit", data, {"provider": provider})
+        out.sample(
+            "circuit_state",
+            CIRCUIT_STATES.get(data.get("state", ""), 0),
+            {"provider": provider},
+            help_text="0 closed, 1 half open, 2 open.",
+        )
+    return out.render()
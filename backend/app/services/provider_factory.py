@@ -1,15 +1,89 @@
 from __future__ import annotations
 
+import threading
+from typing import Any, Callable
+
 from .gemini import GeminiProvider
 from .groq import GroqProvider
+from .routing import HedgedProvider
 from ..config import settings
 
+PROVIDER_CLASSES: dict[str, Callable[[], Any]] = {
+    "gemini": GeminiProvider,
+    "groq": GroqProvider,
+}
+
+TASKS = ("translate", "transcribe", "summarize")
+
+
+def _task_provider_name(task: str) -> str:
+    overrides = {
+        "translate": settings.ai_translate_provider,
+        "transcribe": settings.ai_transcribe_provider,
+        "summarize": settings.ai_summary_provider,
+    }
+    if task not in overrides:
+        raise RuntimeError(f"Unsupported AI task: {task}")
+    return (overrides[task] or settings.ai_provider).strip().lower()
+
+
+class ProviderRegistry:
+    # One instance per provider for the life of the process; settings are read
+    # once at startup, so configuration changes take effect on restart.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._providers: dict[str, Any] = {}
+
+    def provider(self, name: str) -> Any:
+        with self._lock:
+            instance = self._providers.get(name)
+            if instance is None:
+                factory = PROVIDER_CLASSES.get(name)
+                if factory is None:
+                    raise RuntimeError(f"Unsupported AI_PROVIDER: {name}")
+                instance = factory()
+                self._providers[name] = instance
+            return instance
+
+    def for_task(self, task: str) -> Any:
+        name = _task_provider_name(task)
+        if task == "translate" and settings.ai_translate_routing.strip().lower() == "hedged":
+            return self._hedged(name)
+        return self.provider(name)
+
+    def _hedged(self, primary: str) -> Any:
+        alternates = [name for name in PROVIDER_CLASSES if name != primary]
+        secondary = (settings.ai_hedge_provider or (alternates[0] if alternates else "")).strip().lower()
+        key = f"hedged:{primary}:{secondary}"
+        with self._lock:
+            router = self._providers.get(key)
+        if router is not None:
+            return router
+        members = [(primary, self.provider(primary))]
+        if secondary and secondary != primary:
+            try:
+                members.append((secondary, self.provider(secondary)))
+            except RuntimeError:
+                # No credentials for the alternate: nothing to hedge with.
+                return members[0][1]
+        router = HedgedProvider(members)
+        with self._lock:
+            self._providers.setdefault(key, router)
+        return router
+
+    def warm(self) -> None:
+        for task in TASKS:
+            try:
+                self.for_task(task)
+            except RuntimeError:
+                continue
+
+    def active(self) -> dict[str, str]:
+        return {task: _task_provider_name(task) for task in TASKS}
+
+
+provider_registry = ProviderRegistry()
 
-def get_ai_provider():
-    provider = settings.ai_provider.strip().lower()
-    if provider == "gemini":
-        return GeminiProvider()
-    if provider == "groq":
-        return GroqProvider()
-    raise RuntimeError(f"Unsupported AI_PROVIDER: {settings.ai_provider}")
 
+def get_ai_provider(task: str = "translate"):
+    return provider_registry.for_task(task)
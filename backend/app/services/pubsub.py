@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from ..config import settings
+from ..db import SessionLocal, engine
+from ..models import Message
+from ..schemas import MessageOut
+
+logger = logging.getLogger(__name__)
+
+LISTEN_RETRY_MAX_SECONDS = 30.0
+
+
+class MessageBroker(ABC):
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    @abstractmethod
+    async def publish(self, message: MessageOut) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, conversation_id: str): ...
+
+    def subscriber_count(self) -> int:
+        return 0
+
+
+class InProcessBroker(MessageBroker):
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue[MessageOut]]] = defaultdict(set)
+
+    async def publish(self, message: MessageOut) -> None:
+        for queue in list(self._subscribers.get(message.conversation_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow subscribers miss the push and catch up through list_messages.
+                continue
+
+    @asynccontextmanager
+    async def subscribe(self, conversation_id: str) -> AsyncIterator[asyncio.Queue[MessageOut]]:
+        queue: asyncio.Queue[MessageOut] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[conversation_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(conversation_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[conversation_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+def _load_message(message_id: str) -> MessageOut | None:
+    with SessionLocal() as db:
+        row = db.get(Message, message_id)
+        return MessageOut.model_validate(row, from_attributes=True) if row else None
+
+
+# Cross-worker fan-out via LISTEN/NOTIFY. Notifications carry only ids (NOTIFY
+# payloads are capped at 8000 bytes); each worker loads the row and fans it out
+# to its own subscribers.
+class PostgresBroker(MessageBroker):
+    channel = "nao_messages"
+
+    def __init__(self, queue_size: int) -> None:
+        self._local = InProcessBroker(queue_size)
+        self._listener = None
+        self._task: asyncio.Task | None = None
+
+    async def _connect(self) -> None:
+        import psycopg
+
+        dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener = await psycopg.AsyncConnection.connect(dsn, autocommit=True)
+        await self._listener.execute(f"LISTEN {self.channel}")
+
+    async def start(self) -> None:
+        # The first connection fails startup loudly; later drops are retried.
+        await self._connect()
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._close_listener()
+
+    async def _close_listener(self) -> None:
+        if self._listener is not None:
+            try:
+                await self._listener.close()
+            except Exception:
+                pass
+            self._listener = None
+
+    async def _listen_forever(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                if self._listener is None:
+                    await self._connect()
+                    delay = 1.0
+                async for notify in self._listener.notifies():
+                    await self._deliver(notify.payload)
+                raise ConnectionError("LISTEN connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Pushes on this worker stop until the listener is back;
+                # clients catch up through list_messages meanwhile.
+                logger.warning("message broker listener failed; reconnecting in %.0fs", delay, exc_info=True)
+                await self._close_listener()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LISTEN_RETRY_MAX_SECONDS)
+
+    async def _deliver(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            message = await asyncio.to_thread(_load_message, data["message_id"])
+            if message is not None:
+                await self._local.publish(message)
+        except Exception:
+            logger.warning("dropping message notification %r", payload, exc_info=True)
+
+    def _notify(self, payload: str) -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+            conn.commit()
+
+    async def publish(self, message: MessageOut) -> None:
+        payload = json.dumps({"conversation_id": message.conversation_id, "message_id": message.id})
+        await asyncio.to_thread(self._notify, payload)
+
+    def subscribe(self, conversation_id: str):
+        return self._local.subscribe(conversation_id)
+
+    def subscriber_count(self) -> int:
+        return self._local.subscriber_count()
+
+
+def build_message_broker() -> MessageBroker:
+    kind = settings.message_broker.strip().lower()
+    if kind == "memory":
+        return InProcessBroker(settings.pubsub_queue_size)
+    if kind == "postgres":
+        return PostgresBroker(settings.pubsub_queue_size)
+    raise RuntimeError(f"Unsupported MESSAGE_BROKER: {settings.message_broker}")
+
+
+message_broker = build_message_broker()
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+
+from ..config import settings
+from .latency import latency_histogram
+from .tokens import count_tokens
+
+T = TypeVar("T")
+
+# Lower runs first: live translation beats transcription beats summaries.
+TASK_PRIORITIES = {"translate": 0, "transcribe": 1, "summarize": 2}
+
+
+class RateLimitedError(RuntimeError):
+    def __init__(self, code: str, retry_after: float | None = None, queued: bool = False) -> None:
+        super().__init__(code)
+        self.retry_after = retry_after
+        # Raised locally after waiting in the governor queue, not by the provider.
+        self.queued = queued
+
+
+def estimate_request_tokens(*prompts: str) -> int:
+    # Provider TPM limits count the reply too; assume one about as long as the prompt.
+    return 2 * sum(count_tokens(prompt) for prompt in prompts)
+
+
+def retry_after_seconds(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("retry-after", "").strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    task: str = field(compare=False)
+
+
+class _Bucket:
+    def __init__(self, per_minute: int) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute * settings.rate_limit_burst_seconds / 60.0, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        # A request larger than the whole bucket is admitted once the bucket is
+        # full and drives it negative, instead of waiting forever.
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+
+class ProviderGovernor:
+    def __init__(self, name: str, rpm: int, tpm: int, max_concurrency: int) -> None:
+        self.name = name
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.admitted = 0
+        self.throttled = 0
+        self.queue_timeouts = 0
+        self.wait_seconds_total: dict[str, float] = {}
+        self.wait_seconds_max: dict[str, float] = {}
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None:
+            if self._timer.when() <= when:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._pump)
+
+    def _pump(self) -> None:
+        self._timer = None
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._queue:
+            waiter = self._queue[0]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= int(self.limit):
+                # release() pumps again.
+                return
+            delay = max(self.blocked_until - now, 0.0)
+            if self._requests.enabled:
+                delay = max(delay, self._requests.wait_for(1))
+            if self._tokens.enabled and waiter.tokens:
+                delay = max(delay, self._tokens.wait_for(waiter.tokens))
+            if delay > 0:
+                self._schedule(delay)
+                return
+            heapq.heappop(self._queue)
+            self._requests.level -= 1
+            self._tokens.level -= waiter.tokens
+            self.in_flight += 1
+            self.admitted += 1
+            waited = now - waiter.enqueued_at
+            self.wait_seconds_total[waiter.task] = self.wait_seconds_total.get(waiter.task, 0.0) + waited
+            self.wait_seconds_max[waiter.task] = max(self.wait_seconds_max.get(waiter.task, 0.0), waited)
+            waiter.future.set_result(None)
+
+    async def _acquire(self, task: str, tokens: int) -> None:
+        waiter = _Waiter(
+            priority=TASK_PRIORITIES.get(task, len(TASK_PRIORITIES)),
+            seq=next(self._seq),
+            tokens=max(tokens, 0),
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.monotonic(),
+            task=task,
+        )
+        heapq.heappush(self._queue, waiter)
+        self._pump()
+        try:
+            await asyncio.wait_for(waiter.future, timeout=settings.rate_limit_queue_timeout_seconds)
+        except asyncio.TimeoutError as exc:
+            self.queue_timeouts += 1
+            raise RateLimitedError(f"{self.name}_rate_limited", queued=True) from exc
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._pump()
+
+    def _on_success(self) -> None:
+        # AIMD: additive increase of one slot per window of successes...
+        self.limit = min(self.limit + 1.0 / self.limit, float(self.max_concurrency))
+
+    def _on_throttled(self, retry_after: float | None) -> None:
+        # ...multiplicative decrease on every 429, and a pause for everyone.
+        self.throttled += 1
+        self.limit = max(self.limit / 2.0, 1.0)
+        pause = retry_after if retry_after is not None else settings.rate_limit_default_backoff_seconds
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    @asynccontextmanager
+    async def slot(self, task: str, tokens: int = 0) -> AsyncIterator[None]:
+        await self._acquire(task, tokens)
+        histogram = latency_histogram(self.name, task)
+        started = time.monotonic()
+        try:
+            yield
+        except RateLimitedError as exc:
+            histogram.error()
+            self._on_throttled(exc.retry_after)
+            raise
+        except Exception:
+            histogram.error()
+            raise
+        else:
+            histogram.observe(time.monotonic() - started)
+            self._on_success()
+        finally:
+            self._release()
+
+    async def call(self, task: str, tokens: int, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(task, tokens):
+                    return await fn()
+            except RateLimitedError as exc:
+                attempt += 1
+                too_long = (exc.retry_after or 0.0) > settings.rate_limit_max_retry_after_seconds
+                if exc.queued or attempt > settings.rate_limit_max_retries or too_long:
+                    raise
+
+    def metrics(self) -> dict[str, Any]:
+        depth: dict[str, int] = {}
+        for waiter in self._queue:
+            if not waiter.future.done():
+                depth[waiter.task] = depth.get(waiter.task, 0) + 1
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": depth,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "queue_timeouts": self.queue_timeouts,
+            "blocked_for_seconds": round(max(self.blocked_until - time.monotonic(), 0.0), 3),
+            "wait_seconds_total": {task: round(value, 6) for task, value in self.wait_seconds_total.items()},
+            "wait_seconds_max": {task: round(value, 6) for task, value in self.wait_seconds_max.items()},
+        }
+
+
+_governors: dict[str, ProviderGovernor] = {}
+
+
+def _limits(name: str) -> tuple[int, int]:
+    return {
+        "groq": (settings.groq_rpm, settings.groq_tpm),
+        "gemini": (settings.gemini_rpm, settings.gemini_tpm),
+    }.get(name, (0, 0))
+
+
+def get_governor(name: str) -> ProviderGovernor:
+    governor = _governors.get(name)
+    if governor is None:
+        rpm, tpm = _limits(name)
+        governor = ProviderGovernor(name, rpm, tpm, settings.ai_max_concurrency)
+        _governors[name] = governor
+    return governor
+
+
+def governor_metrics() -> dict[str, dict[str, Any]]:
+    return {name: governor.metrics() for name, governor in _governors.items()}
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from ..config import settings
+from .latency import latency_histogram
+
+
+class CircuitBreaker:
+    # closed -> open after N consecutive failures; open -> half_open after the
+    # cooldown, letting one trial call through; its result closes or re-opens.
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trial_started = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= settings.circuit_reset_seconds:
+                self.state = "half_open"
+                self.trial_in_flight = False
+            # A trial that never reported back (e.g. it was not launched) expires.
+            stale = time.monotonic() - self.trial_started >= settings.circuit_reset_seconds
+            if self.state == "half_open" and (not self.trial_in_flight or stale):
+                self.trial_in_flight = True
+                self.trial_started = time.monotonic()
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == "half_open" or self.failures >= settings.circuit_failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+# Process-wide counters for every HedgedProvider, guarded like the breakers.
+_hedge_counts = {"hedges": 0, "hedge_wins": 0}
+_hedge_counts_lock = threading.Lock()
+
+
+def _count_hedge(key: str) -> None:
+    with _hedge_counts_lock:
+        _hedge_counts[key] += 1
+
+
+def routing_metrics() -> dict[str, Any]:
+    with _hedge_counts_lock:
+        counts = dict(_hedge_counts)
+    with _breakers_lock:
+        breakers = sorted(_breakers.items())
+    return {
+        **counts,
+        "circuits": {name: breaker.snapshot() for name, breaker in breakers},
+    }
+
+
+def hedge_delay(name: str) -> float:
+    histogram = latency_histogram(name, "translate")
+    p95 = histogram.quantile(0.95) if histogram.recent_count >= settings.hedge_min_samples else None
+    if p95 is None:
+        return settings.hedge_default_delay_ms / 1000
+    return max(p95, settings.hedge_min_delay_ms / 1000)
+
+
+class HedgedProvider:
+    # Translation-only router over two providers: the first allowed provider
+    # gets the request, the other one is raced in once the first has taken
+    # longer than its recent p95 (or has failed), and the loser is cancelled.
+    def __init__(self, providers: list[tuple[str, Any]]) -> None:
+        self._providers = providers
+
+    @property
+    def translation_model(self) -> str:
+        # Cache under the primary's model so switching routing modes keeps hits.
+        return self._providers[0][1].translation_model
+
+    def _candidates(self) -> list[tuple[str, Any]]:
+        allowed = [(name, provider) for name, provider in self._providers if circuit_breaker(name).allow()]
+        # Every circuit open: still try the primary rather than fail outright.
+        return allowed or self._providers[:1]
+
+    async def _attempt(self, name: str, call: Callable[[], Awaitable[str]]) -> str:
+        breaker = circuit_breaker(name)
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            breaker.failure()
+            raise
+        breaker.success()
+        return result
+
+    async def translate(self, text: str, source_lang: str, target_lang: str, glossary: str = "") -> str:
+        candidates = self._candidates()
+        pending: dict[asyncio.Task, str] = {}
+
+        def launch(name: str, provider: Any) -> None:
+            task = asyncio.create_task(
+                self._attempt(name, lambda: provider.translate(text, source_lang, target_lang, glossary))
+            )
+            pending[task] = name
+
+        launch(*candidates[0])
+        backups = candidates[1:]
+        delay: float | None = hedge_delay(candidates[0][0])
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than p95: race the next provider.
+                    if backups:
+                        _count_hedge("hedges")
+                        launch(*backups.pop(0))
+                    delay = None
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if name != candidates[0][0]:
+                            _count_hedge("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                # A failure hedges immediately instead of waiting out the delay.
+                if backups and not pending:
+                    launch(*backups.pop(0))
+                    delay = None
+            raise error or RuntimeError("hedged_translate_failed")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def translate_batch(
+        self, texts: list[str], source_lang: str, target_lang: str, glossary: str = ""
+    ) -> list[str]:
+        # Batches fail over instead of hedging: a hedge would double a large prompt.
+        candidates = self._candidates()
+        for index, (name, provider) in enumerate(candidates):
+            try:
+                return await self._attempt(
+                    name, lambda: provider.translate_batch(texts, source_lang, target_lang, glossary)
+                )
+            except ValueError:
+                raise
+            except Exception:
+                if index == len(candidates) - 1:
+                    raise
+        raise RuntimeError("hedged_translate_failed")
+
+    async def translate_stream(
+        self, text: str, source_lang: str, target_lang: str, glossary: str = ""
+    ) -> AsyncIterator[str]:
+        # Streams are not raced (both would bill tokens for the whole reply);
+        # a provider that fails before its first delta fails over to the next.
+        candidates = self._candidates()
+        for index, (name, provider) in enumerate(candidates):
+            breaker = circuit_breaker(name)
+            started = False
+            try:
+                async for delta in provider.translate_stream(text, source_lang, target_lang, glossary):
+                    started = True
+                    yield delta
+            except Exception:
+                breaker.failure()
+                if started or index == len(candidates) - 1:
+                    raise
+                continue
+            breaker.success()
+            return
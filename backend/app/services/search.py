@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import base64
+import html
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import and_, bindparam, inspect, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Message
+
+logger = logging.getLogger(__name__)
+
+# Postgres text search configs for LANGUAGE_OPTIONS; anything else (zh, ar, hi,
+# bn) is indexed with 'simple', which lower-cases without stemming.
+TS_CONFIGS = {
+    "en": "english",
+    "es": "spanish",
+    "pt": "portuguese",
+    "ru": "russian",
+}
+QUERY_CONFIGS = sorted(set(TS_CONFIGS.values())) + ["simple"]
+
+_CONFIG_CASE = " ".join(f"WHEN '{code}' THEN '{config}'::regconfig" for code, config in TS_CONFIGS.items())
+
+POSTGRES_SEARCH_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION nao_ts_config(lang text) RETURNS regconfig
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT CASE lang {_CONFIG_CASE} ELSE 'simple'::regconfig END $$
+    """
+
+# Adding a stored generated column rewrites the table under an ACCESS EXCLUSIVE
+# lock, so it only runs when the column is missing, and gives up rather than
+# queueing every other query on messages behind it.
+POSTGRES_SEARCH_COLUMN = """
+    ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector(nao_ts_config(source_language),
+                              coalesce(original_text, '') || ' ' || coalesce(transcript_text, '')), 'A')
+        || setweight(to_tsvector(nao_ts_config(target_language), coalesce(translated_text, '')), 'B')
+    ) STORED
+    """
+
+POSTGRES_SEARCH_INDEX = "ix_messages_search_vector"
+
+# External-content FTS5 index over messages, keyed by the implicit rowid and
+# kept in sync by triggers. VACUUM may renumber rowids of tables without an
+# INTEGER PRIMARY KEY; run "INSERT INTO messages_fts(messages_fts) VALUES('rebuild')"
+# afterwards.
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        original_text, transcript_text, translated_text,
+        content='messages', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, original_text, transcript_text, translated_text)
+        VALUES (new.rowid, new.original_text, new.transcript_text, new.translated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, original_text, transcript_text, translated_text)
+        VALUES ('delete', old.rowid, old.original_text, old.transcript_text, old.translated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, original_text, transcript_text, translated_text)
+        VALUES ('delete', old.rowid, old.original_text, old.transcript_text, old.translated_text);
+        INSERT INTO messages_fts(rowid, original_text, transcript_text, translated_text)
+        VALUES (new.rowid, new.original_text, new.transcript_text, new.translated_text);
+    END
+    """,
+]
+
+_fts5_ready = False
+
+# Highlights come back from the database wrapped in private-use sentinels, so
+# the text can be HTML-escaped before the sentinels become <mark> tags.
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+_HEADLINE_OPTIONS = f"StartSel={MARK_START}, StopSel={MARK_END}"
+
+# The searcher's language is unknown, so OR the query across every config:
+# each stemmed form can match rows indexed in that language.
+_TSQUERY = " || ".join(f"plainto_tsquery('{config}', :q)" for config in QUERY_CONFIGS)
+
+
+def _ensure_sqlite_fts(bind: Engine) -> None:
+    global _fts5_ready
+    created = not inspect(bind).has_table("messages_fts")
+    try:
+        with bind.begin() as conn:
+            for statement in SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+            if created:
+                conn.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        # SQLite built without FTS5: keep the LIKE scan.
+        _fts5_ready = False
+        return
+    _fts5_ready = True
+
+
+def _postgres_search_state(conn: Any) -> tuple[bool, bool | None]:
+    has_column = conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = 'messages' AND column_name = 'search_vector'"
+        )
+    ).first()
+    index_valid = conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace"
+        ),
+        {"name": POSTGRES_SEARCH_INDEX},
+    ).scalar()
+    return has_column is not None, index_valid
+
+
+def _ensure_postgres_search(bind: Engine) -> None:
+    # CONCURRENTLY cannot run inside a transaction block, so this connection
+    # autocommits; the column is added on a separate, transactional one.
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        has_column, index_valid = _postgres_search_state(conn)
+        if has_column and index_valid:
+            return
+        # One worker builds; the others boot without waiting for it.
+        if not conn.execute(text("SELECT pg_try_advisory_lock(hashtext('nao_search_index'))")).scalar():
+            return
+        try:
+            has_column, index_valid = _postgres_search_state(conn)
+            if not has_column:
+                try:
+                    with bind.begin() as ddl:
+                        ddl.execute(text(f"SET LOCAL lock_timeout = '{int(settings.search_ddl_lock_timeout_ms)}ms'"))
+                        ddl.execute(text(POSTGRES_SEARCH_FUNCTION))
+                        ddl.execute(text(POSTGRES_SEARCH_COLUMN))
+                except DBAPIError:
+                    # Busy table: serve traffic now and add the column on a later boot.
+                    logger.warning("search column not added; retrying on next startup", exc_info=True)
+                    return
+            # Under the lock no build is in progress, so an invalid index is
+            # left over from a failed one and is rebuilt.
+            if index_valid is False:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {POSTGRES_SEARCH_INDEX}"))
+            if not index_valid:
+                conn.execute(
+                    text(f"CREATE INDEX CONCURRENTLY {POSTGRES_SEARCH_INDEX} ON messages USING GIN (search_vector)")
+                )
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext('nao_search_index'))"))
+
+
+def ensure_search_index(bind: Engine) -> None:
+    if bind.dialect.name == "sqlite":
+        _ensure_sqlite_fts(bind)
+        return
+    if bind.dialect.name == "postgresql":
+        _ensure_postgres_search(bind)
+
+
+def fts5_match_expression(q: str) -> str:
+    # Quote every token so user input is never parsed as FTS5 syntax, and
+    # prefix-match each one to keep the substring feel of the old LIKE search.
+    tokens = [token.replace('"', '""') for token in q.split()]
+    return " ".join(f'"{token}"*' for token in tokens if token)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    raw = json.dumps(values, default=lambda value: value.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("invalid_cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("invalid_cursor")
+    return values
+
+
+def _recency_key(cursor: list[Any] | None) -> tuple[datetime, str] | None:
+    if cursor is None:
+        return None
+    try:
+        created_at, message_id = cursor
+        return datetime.fromisoformat(created_at), str(message_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid_cursor") from exc
+
+
+def snippet_html(raw: str) -> str:
+    return html.escape(raw).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def _highlight(text_value: str, q: str) -> str:
+    terms = [re.escape(term) for term in q.split() if term]
+    if not terms:
+        return snippet_html(text_value)
+    pattern = re.compile("|".join(terms), re.IGNORECASE)
+    return snippet_html(pattern.sub(lambda match: f"{MARK_START}{match.group(0)}{MARK_END}", text_value))
+
+
+def _page(rows: list[Any], limit: int, key: Callable[[Any], list[Any]]) -> tuple[list[Any], str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def _search_postgres(
+    db: Session, q: str, conversation_id: str | None, limit: int, cursor: list[Any] | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    # Scoped and global searches get separate statements so the planner can use
+    # ix_messages_conversation_created_id / ix_messages_created_id instead of an
+    # "OR :param IS NULL" predicate that defeats both.
+    params: dict[str, Any] = {"q": q, "limit": limit + 1, "headline_options": _HEADLINE_OPTIONS}
+    filters = ["m.search_vector @@ query.tsq"]
+    if conversation_id:
+        filters.append("m.conversation_id = :conversation_id")
+        params["conversation_id"] = conversation_id
+    key = _recency_key(cursor)
+    if key is not None:
+        filters.append("(m.created_at, m.id) < (:cursor_created_at, :cursor_id)")
+        params["cursor_created_at"], params["cursor_id"] = key
+
+    sql = f"""
+    WITH query AS (SELECT {_TSQUERY} AS tsq),
+    hits AS (
+        SELECT m.id, m.conversation_id, m.role, m.created_at, m.source_language,
+               m.original_text, m.transcript_text, m.translated_text
+        FROM messages m, query
+        WHERE {" AND ".join(filters)}
+        ORDER BY m.created_at DESC, m.id DESC
+        LIMIT :limit
+    )
+    SELECT hits.id, hits.conversation_id, hits.role, hits.created_at,
+           ts_headline(nao_ts_config(hits.source_language),
+             coalesce(hits.original_text,'') || ' ' || coalesce(hits.transcript_text,'') || ' '
+               || coalesce(hits.translated_text,''),
+             query.tsq, :headline_options
+           ) AS snippet
+    FROM hits, query
+    ORDER BY hits.created_at DESC, hits.id DESC
+    """
+    rows = [{**row, "snippet": snippet_html(row["snippet"])} for row in db.execute(text(sql), params).mappings()]
+    return _page(rows, limit, lambda row: [row["created_at"], row["id"]])
+
+
+def _search_sqlite_fts(
+    db: Session, q: str, conversation_id: str | None, limit: int, cursor: list[Any] | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    match = fts5_match_expression(q)
+    if not match:
+        return [], None
+    params: dict[str, Any] = {"match": match, "limit": limit + 1, "mark_start": MARK_START, "mark_end": MARK_END}
+    filters = ["messages_fts MATCH :match"]
+    if conversation_id:
+        filters.append("m.conversation_id = :conversation_id")
+        params["conversation_id"] = conversation_id
+    created_at_type = Message.__table__.c.created_at.type
+    binds = []
+    if cursor is not None:
+        # Keyset on (bm25 rank, created_at, id): rank ascends, and equal ranks
+        # fall back to the newest-first order used elsewhere. rowid is not a
+        # stable tie-breaker because VACUUM may renumber it.
+        try:
+            params["cursor_rank"] = float(cursor[0])
+            params["cursor_created_at"], params["cursor_id"] = _recency_key(cursor[1:])
+        except (IndexError, TypeError, ValueError) as exc:
+            raise ValueError("invalid_cursor") from exc
+        binds.append(bindparam("cursor_created_at", type_=created_at_type))
+        filters.append(
+            "(messages_fts.rank > :cursor_rank"
+            " OR (messages_fts.rank = :cursor_rank AND (m.created_at < :cursor_created_at"
+            " OR (m.created_at = :cursor_created_at AND m.id < :cursor_id))))"
+        )
+
+    sql = f"""
+    SELECT m.id, m.conversation_id, m.role, m.created_at,
+           snippet(messages_fts, -1, :mark_start, :mark_end, '…', 24) AS snippet,
+           messages_fts.rank AS rank
+    FROM messages_fts
+    JOIN messages m ON m.rowid = messages_fts.rowid
+    WHERE {" AND ".join(filters)}
+    ORDER BY messages_fts.rank, m.created_at DESC, m.id DESC
+    LIMIT :limit
+    """
+    stmt = text(sql).bindparams(*binds).columns(created_at=created_at_type)
+    rows = [{**row, "snippet": snippet_html(row["snippet"])} for row in db.execute(stmt, params).mappings()]
+    return _page(rows, limit, lambda row: [row["rank"], row["created_at"], row["id"]])
+
+
+def _search_like(
+    db: Session, q: str, conversation_id: str | None, limit: int, cursor: list[Any] | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    pattern = f"%{q}%"
+    stmt = (
+        select(Message)
+        .where(
+            or_(
+                Message.original_text.ilike(pattern),
+                Message.transcript_text.ilike(pattern),
+                Message.translated_text.ilike(pattern),
+            )
+        )
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit + 1)
+    )
+    if conversation_id:
+        stmt = stmt.where(Message.conversation_id == conversation_id)
+    key = _recency_key(cursor)
+    if key is not None:
+        created_at, message_id = key
+        stmt = stmt.where(
+            or_(
+                Message.created_at < created_at,
+                and_(Message.created_at == created_at, Message.id < message_id),
+            )
+        )
+    items = db.scalars(stmt).all()
+    rows = [
+        {
+            "id": row.id,
+            "conversation_id": row.conversation_id,
+            "role": row.role,
+            "created_at": row.created_at,
+            "snippet": _highlight((row.original_text or row.transcript_text or row.translated_text or "")[:220], q),
+        }
+        for row in items
+    ]
+    return _page(rows, limit, lambda row: [row["created_at"], row["id"]])
+
+
+def search_messages(
+    db: Session, q: str, conversation_id: str | None, limit: int, cursor: str | None = None
+) -> tuple[list[dict[str, Any]], str | None]:
+    position = decode_cursor(cursor) if cursor else None
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return _search_postgres(db, q, conversation_id, limit, position)
+    if dialect == "sqlite" and _fts5_ready:
+        return _search_sqlite_fts(db, q, conversation_id, limit, position)
+    return _search_like(db, q, conversation_id, limit, position)
@@ -1,25 +1,77 @@
 from __future__ import annotations
 
+import threading
 import uuid
+from typing import Any, BinaryIO
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from ..config import settings
+from .audio_normalize import audio_extension
+
+_client: Any = None
+_client_lock = threading.Lock()
+
+
+class AudioObjectMissingError(LookupError):
+    pass
+
+
+def build_s3_client() -> Any:
+    # A private Session: boto3's default session is not safe to build clients
+    # from concurrently.
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url or None,
+        region_name=settings.s3_region,
+        aws_access_key_id=settings.s3_access_key_id or None,
+        aws_secret_access_key=settings.s3_secret_access_key or None,
+        config=Config(
+            max_pool_connections=settings.s3_max_pool_connections,
+            retries={"mode": "standard"},
+        ),
+    )
+
+
+def get_s3_client() -> Any:
+    # boto3 clients are thread-safe once built; one client keeps one urllib3
+    # pool of warm connections for every server-side read.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_s3_client()
+    return _client
+
+
+def conversation_key_prefix(conversation_id: str) -> str:
+    return f"conversations/{conversation_id}/"
+
+
+def object_url(key: str) -> str:
+    if settings.s3_public_base_url:
+        base = settings.s3_public_base_url.rstrip("/")
+        return f"{base}/{key}"
+    endpoint = (settings.s3_endpoint_url or "").rstrip("/")
+    return f"{endpoint}/{settings.s3_bucket}/{key}" if endpoint else key
 
 
 class StorageService:
-    def __init__(self) -> None:
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=settings.s3_endpoint_url or None,
-            region_name=settings.s3_region,
-            aws_access_key_id=settings.s3_access_key_id or None,
-            aws_secret_access_key=settings.s3_secret_access_key or None,
-        )
+    # Long-lived: shares the process-wide S3 client, so presigning is pure
+    # local signing with no per-request client construction.
+    @property
+    def client(self) -> Any:
+        return get_s3_client()
+
+    def warm(self) -> None:
+        if settings.s3_bucket:
+            get_s3_client()
 
-    def presign_audio_upload(self, conversation_id: str, mime_type: str) -> dict[str, str]:
-        ext = "webm"
-        key = f"conversations/{conversation_id}/{uuid.uuid4()}.{ext}"
+    def presign_audio_upload(self, conversation_id: str, mime_type: str) -> dict[str, Any]:
+        ext = audio_extension(mime_type)
+        key = f"{conversation_key_prefix(conversation_id)}{uuid.uuid4()}.{ext}"
         upload_url = self.client.generate_presigned_url(
             ClientMethod="put_object",
             Params={
@@ -27,14 +79,56 @@ class StorageService:
                 "Key": key,
                 "ContentType": mime_type,
             },
-            ExpiresIn=600,
+            ExpiresIn=settings.s3_presign_expires_seconds,
         )
+        return {
+            "upload_url": upload_url,
+            "file_url": object_url(key),
+            "object_key": key,
+            "expires_in": settings.s3_presign_expires_seconds,
+        }
+
+    def presign_audio_uploads(self, conversation_id: str, mime_type: str, count: int) -> list[dict[str, Any]]:
+        return [self.presign_audio_upload(conversation_id, mime_type) for _ in range(count)]
+
+
+storage_service = StorageService()
+
+
+def _missing(exc: ClientError) -> bool:
+    code = str(exc.response.get("Error", {}).get("Code", ""))
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+def head_object_size(key: str) -> tuple[int, str]:
+    try:
+        head = get_s3_client().head_object(Bucket=settings.s3_bucket, Key=key)
+    except ClientError as exc:
+        if _missing(exc):
+            raise AudioObjectMissingError(key) from exc
+        raise
+    return int(head["ContentLength"]), str(head.get("ETag", ""))
 
-        if settings.s3_public_base_url:
-            base = settings.s3_public_base_url.rstrip("/")
-            file_url = f"{base}/{key}"
-        else:
-            endpoint = (settings.s3_endpoint_url or "").rstrip("/")
-            file_url = f"{endpoint}/{settings.s3_bucket}/{key}" if endpoint else key
 
-        return {"upload_url": upload_url, "file_url": file_url, "object_key": key}
+def download_object(key: str, size: int, etag: str, out: BinaryIO) -> None:
+    # Ranged GETs bound how much a single response streams and let a retry
+    # resume at the failed range; IfMatch pins every range to the object
+    # version that HEAD sized.
+    client = get_s3_client()
+    range_bytes = max(settings.s3_range_bytes, 1)
+    for start in range(0, size, range_bytes):
+        end = min(start + range_bytes, size) - 1
+        params: dict[str, Any] = {"Bucket": settings.s3_bucket, "Key": key, "Range": f"bytes={start}-{end}"}
+        if etag:
+            params["IfMatch"] = etag
+        try:
+            body = client.get_object(**params)["Body"]
+        except ClientError as exc:
+            if _missing(exc):
+                raise AudioObjectMissingError(key) from exc
+            raise
+        try:
+            for chunk in body.iter_chunks(64 * 1024):
+                out.write(chunk)
+        finally:
+            body.close()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from ..config import settings
+from .metrics import span
+from .tokens import count_lines_tokens, split_by_token_budget
+
+LIST_KEYS = ("symptoms", "diagnoses", "medications", "follow_up")
+
+# summary_lines emits an original/translated pair per message.
+LINES_PER_MESSAGE = 2
+
+
+def _item_key(item: Any) -> str:
+    return " ".join(str(item).split()).casefold().rstrip(".;,")
+
+
+def merge_partials(partials: list[dict[str, Any]]) -> dict[str, list[Any]]:
+    merged: dict[str, list[Any]] = {}
+    for key in LIST_KEYS:
+        seen: set[str] = set()
+        items: list[Any] = []
+        for partial in partials:
+            for item in partial.get(key, []) or []:
+                item_key = _item_key(item)
+                if item_key and item_key not in seen:
+                    seen.add(item_key)
+                    items.append(item)
+        merged[key] = items
+    return merged
+
+
+async def _summarize(
+    provider: Any, lines: list[str], style: str, previous: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    with span("summarize_medical", provider):
+        return await provider.summarize_medical(lines, style, previous=previous)
+
+
+async def summarize_lines(
+    provider: Any, lines: list[str], style: str, previous: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    budget = settings.summary_chunk_tokens
+    if settings.summary_mode == "single" or count_lines_tokens(lines) <= budget:
+        return await _summarize(provider, lines, style, previous)
+
+    # Map: summarize token-budgeted windows concurrently.
+    semaphore = asyncio.Semaphore(max(settings.summary_map_concurrency, 1))
+
+    async def summarize_window(window: list[str]) -> dict[str, Any]:
+        async with semaphore:
+            return await _summarize(provider, window, style)
+
+    windows = split_by_token_budget(lines, budget, group=LINES_PER_MESSAGE)
+    partials = list(await asyncio.gather(*(summarize_window(window) for window in windows)))
+
+    # Reduce: lists are merged locally with de-duplication; one final call
+    # turns the partial summaries into a single narrative.
+    merged = merge_partials(([previous] if previous else []) + partials)
+    reduce_lines = [f"[part {index + 1}] {partial['summary']}" for index, partial in enumerate(partials)]
+    final = await _summarize(
+        provider,
+        reduce_lines,
+        style,
+        previous={"summary": previous["summary"] if previous else "", **merged},
+    )
+    return {"summary": final["summary"], **merge_partials([merged, final])}
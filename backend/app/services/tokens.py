@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Set once the tiktoken encoding has loaded; until then (and without
+# tiktoken) token counts are estimated from the byte length.
+_encoding: Any = None
+_load_started = False
+_load_lock = threading.Lock()
+
+
+def _load_encoding() -> None:
+    global _encoding
+    try:
+        import tiktoken
+    except ImportError:
+        return
+    try:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable; estimating token counts", exc_info=True)
+
+
+def start_encoding_load() -> None:
+    # get_encoding downloads the BPE file on first use, with no timeout, unless
+    # TIKTOKEN_CACHE_DIR already holds it. A daemon thread keeps that off the
+    # event loop and never holds up shutdown.
+    global _load_started
+    with _load_lock:
+        if _load_started:
+            return
+        _load_started = True
+    threading.Thread(target=_load_encoding, name="tiktoken-load", daemon=True).start()
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Without tiktoken, budget conservatively: ~3 UTF-8 bytes per token is an
+    # overestimate for Latin scripts and about right for CJK/Devanagari/Bengali.
+    return (len(text.encode("utf-8")) + 2) // 3
+
+
+def count_lines_tokens(lines: list[str]) -> int:
+    return sum(count_tokens(line) + 1 for line in lines)
+
+
+def split_by_token_budget(lines: list[str], budget: int, group: int = 1) -> list[list[str]]:
+    # Every `group` consecutive lines stay in the same chunk, even if that
+    # pushes the chunk past the budget.
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for start in range(0, len(lines), group):
+        block = lines[start : start + group]
+        cost = count_lines_tokens(block)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.extend(block)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
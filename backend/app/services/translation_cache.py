@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models import TranslationCacheEntry, now_utc
+from .batching import translation_batcher
+from .glossary import glossary_store
+from .metrics import add_request_time, span
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace only: case can change the meaning ("US" vs "us").
+    return " ".join(text.split())
+
+
+def cache_key(text: str, source_lang: str, target_lang: str, model: str) -> str:
+    raw = "\x1f".join([normalize_text(text), source_lang, target_lang, model])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record(self, hit: bool, persistent: bool = False) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.persistent_hits += int(persistent)
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+            hits, persistent_hits, misses, evictions = self.hits, self.persistent_hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "size": size,
+            "hits": hits,
+            "persistent_hits": persistent_hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def _load_persistent(key: str) -> tuple[str, float] | None:
+    # Returns the translation and the seconds it has left to live.
+    now = now_utc()
+    with SessionLocal() as db:
+        row = db.execute(
+            select(TranslationCacheEntry.translated_text, TranslationCacheEntry.created_at).where(
+                TranslationCacheEntry.key == key,
+                TranslationCacheEntry.created_at >= now - timedelta(seconds=settings.translation_cache_ttl_seconds),
+            )
+        ).first()
+    if row is None:
+        return None
+    created_at = row.created_at if row.created_at.tzinfo else row.created_at.replace(tzinfo=timezone.utc)
+    return row.translated_text, settings.translation_cache_ttl_seconds - (now - created_at).total_seconds()
+
+
+def _prune_due() -> bool:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < settings.translation_cache_prune_interval_seconds:
+            return False
+        _last_prune = time.monotonic()
+        return True
+
+
+def _store_persistent(key: str, text: str, source_lang: str, target_lang: str, model: str, translated: str) -> None:
+    with SessionLocal() as db:
+        db.merge(
+            TranslationCacheEntry(
+                key=key,
+                source_language=source_lang,
+                target_language=target_lang,
+                model=model,
+                source_text=text,
+                translated_text=translated,
+                created_at=now_utc(),
+            )
+        )
+        if _prune_due():
+            cutoff = now_utc() - timedelta(seconds=settings.translation_cache_ttl_seconds)
+            db.execute(delete(TranslationCacheEntry).where(TranslationCacheEntry.created_at < cutoff))
+        db.commit()
+
+
+translation_cache = TranslationCache(settings.translation_cache_max_entries, settings.translation_cache_ttl_seconds)
+
+
+def _cacheable(text: str) -> bool:
+    return settings.translation_cache_enabled and len(text) <= settings.translation_cache_max_text_chars
+
+
+def _provider_model(provider: Any, glossary: str = "") -> str:
+    model = getattr(provider, "translation_model", type(provider).__name__)
+    # A glossary changes the prompt, so it gets its own cache entries.
+    if glossary:
+        model = f"{model}+glossary:{hashlib.sha256(glossary.encode('utf-8')).hexdigest()[:16]}"
+    return model
+
+
+async def cache_lookup(
+    provider: Any, text: str, source_lang: str, target_lang: str, glossary: str = ""
+) -> str | None:
+    if not _cacheable(text):
+        return None
+    key = cache_key(text, source_lang, target_lang, _provider_model(provider, glossary))
+
+    cached = translation_cache.get(key)
+    if cached is not None:
+        translation_cache.record(hit=True)
+        return cached
+
+    if settings.translation_cache_persistent:
+        try:
+            stored = await asyncio.to_thread(_load_persistent, key)
+        except Exception:
+            logger.warning("translation cache read failed", exc_info=True)
+            stored = None
+        if stored is not None:
+            translated, ttl_seconds = stored
+            translation_cache.record(hit=True, persistent=True)
+            translation_cache.put(key, translated, ttl_seconds)
+            return translated
+
+    translation_cache.record(hit=False)
+    return None
+
+
+async def cache_store(
+    provider: Any, text: str, source_lang: str, target_lang: str, translated: str, glossary: str = ""
+) -> None:
+    if not _cacheable(text):
+        return
+    model = _provider_model(provider, glossary)
+    key = cache_key(text, source_lang, target_lang, model)
+    translation_cache.put(key, translated)
+    if settings.translation_cache_persistent:
+        # Best-effort: the translation already succeeded, so a failed write
+        # (e.g. two workers inserting the same key) must not reach the caller.
+        try:
+            await asyncio.to_thread(_store_persistent, key, text.strip(), source_lang, target_lang, model, translated)
+        except Exception:
+            logger.warning("translation cache write failed", exc_info=True)
+
+
+async def cached_translate(
+    provider: Any,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    glossary: str = "",
+    conversation_id: str | None = None,
+) -> str:
+    cached = await cache_lookup(provider, text, source_lang, target_lang, glossary)
+    if cached is not None:
+        return cached
+    if settings.translation_batching_enabled:
+        # The batcher records provider spans itself, so the batch window is
+        # not counted as provider latency; the request still sees the wait.
+        started = time.perf_counter()
+        try:
+            translated = await translation_batcher.translate(provider, text, source_lang, target_lang, glossary)
+        finally:
+            add_request_time("provider", time.perf_counter() - started)
+    else:
+        with span("translate", provider):
+            translated = await provider.translate(text, source_lang, target_lang, glossary)
+    if conversation_id:
+        glossary_store.note_translation(conversation_id)
+    await cache_store(provider, text, source_lang, target_lang, translated, glossary)
+    return translated
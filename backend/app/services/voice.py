@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from ..config import settings
+from .metrics import span
+from .provider_factory import get_ai_provider
+
+PartialHandler = Callable[[int, str, str], Awaitable[None]]
+
+# Longest word run checked when de-duplicating the seam between two segments.
+_MAX_SEAM_WORDS = 6
+
+
+class VoiceStreamTooLargeError(ValueError):
+    pass
+
+
+def stitch_transcripts(parts: list[str]) -> str:
+    # Segments are cut on fixed timers, so Whisper sometimes repeats the last
+    # words of one segment at the start of the next; drop the repeated run.
+    words: list[str] = []
+    for part in parts:
+        incoming = part.split()
+        if not incoming:
+            continue
+        overlap = 0
+        for size in range(min(_MAX_SEAM_WORDS, len(words), len(incoming)), 0, -1):
+            tail = [word.lower().strip(".,!?") for word in words[-size:]]
+            head = [word.lower().strip(".,!?") for word in incoming[:size]]
+            if tail == head:
+                overlap = size
+                break
+        words.extend(incoming[overlap:])
+    return " ".join(words)
+
+
+# The client restarts its recorder every few seconds, so each segment is a
+# complete file the provider can decode on its own. Segments are transcribed
+# concurrently while recording continues and stitched in arrival order.
+class VoiceStream:
+    def __init__(self, mime_type: str, language_hint: str, on_partial: PartialHandler | None = None) -> None:
+        self.mime_type = mime_type
+        self.language_hint = language_hint
+        self.on_partial = on_partial
+        self.received_bytes = 0
+        self.failed_segments = 0
+        self._texts: list[str | None] = []
+        self._tasks: list[asyncio.Task] = []
+        self._semaphore = asyncio.Semaphore(max(settings.voice_segment_concurrency, 1))
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._texts)
+
+    def add_segment(self, audio: bytes) -> None:
+        self.received_bytes += len(audio)
+        if self.received_bytes > settings.max_audio_mb * 1024 * 1024:
+            raise VoiceStreamTooLargeError("Audio file too large")
+        if len(self._texts) >= settings.voice_max_segments:
+            raise VoiceStreamTooLargeError("Too many audio segments")
+        index = len(self._texts)
+        self._texts.append(None)
+        self._tasks.append(asyncio.create_task(self._transcribe(index, audio)))
+
+    def transcript(self) -> str:
+        # Only the contiguous prefix of finished segments, so partial text
+        # never has gaps.
+        done: list[str] = []
+        for text in self._texts:
+            if text is None:
+                break
+            done.append(text)
+        return stitch_transcripts(done)
+
+    async def _transcribe(self, index: int, audio: bytes) -> None:
+        async with self._semaphore:
+            try:
+                provider = get_ai_provider("transcribe")
+                with span("transcribe_audio", provider):
+                    text = await provider.transcribe_audio(audio, self.mime_type, self.language_hint)
+            except Exception:
+                self.failed_segments += 1
+                text = ""
+        self._texts[index] = text
+        if self.on_partial is not None:
+            try:
+                await self.on_partial(index, text, self.transcript())
+            except Exception:
+                pass
+
+    async def finish(self) -> str:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self.transcript()
+
+    async def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
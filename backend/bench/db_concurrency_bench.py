@@ -0,0 +1,126 @@
+"""Event-loop latency under mixed load: sync Session vs AsyncSession writes.
+
+Run from the repository root:
+
+    python -m backend.bench.db_concurrency_bench --writers 20 --writes 25
+
+Writer tasks simulate send_text (provider I/O followed by an insert+commit)
+while a probe task measures how long the event loop takes to service a
+1 ms sleep, i.e. the extra latency every other request on the worker sees.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.db import Base, async_database_url
+from backend.app.models import Conversation, Message
+
+
+def _durable_sqlite(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA synchronous=FULL")
+        cursor.close()
+
+
+def _message(conversation_id: str, index: int) -> Message:
+    return Message(
+        conversation_id=conversation_id,
+        role="doctor",
+        modality="text",
+        original_text=f"message {index}",
+        translated_text=f"mensaje {index}",
+        source_language="en",
+        target_language="es",
+    )
+
+
+async def _probe(stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append(time.perf_counter() - start - 0.001)
+
+
+async def _run(mode: str, url: str, conversation_id: str, writers: int, writes: int) -> list[float]:
+    samples: list[float] = []
+    stop = asyncio.Event()
+
+    if mode == "sync":
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        _durable_sqlite(engine)
+        factory = sessionmaker(bind=engine)
+
+        async def writer(worker: int) -> None:
+            for index in range(writes):
+                await asyncio.sleep(0.005)
+                with factory() as db:
+                    db.add(_message(conversation_id, worker * writes + index))
+                    db.commit()
+    else:
+        engine = create_async_engine(async_database_url(url))
+        _durable_sqlite(engine.sync_engine)
+        factory = async_sessionmaker(bind=engine)
+
+        async def writer(worker: int) -> None:
+            for index in range(writes):
+                await asyncio.sleep(0.005)
+                async with factory() as db:
+                    db.add(_message(conversation_id, worker * writes + index))
+                    await db.commit()
+
+    probe = asyncio.create_task(_probe(stop, samples))
+    await asyncio.gather(*(writer(worker) for worker in range(writers)))
+    stop.set()
+    await probe
+
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[max(int(len(ordered) * 0.99) - 1, 0)]
+    print(
+        f"{label:<6} probes={len(samples):5d} mean={statistics.mean(samples) * 1000:7.3f}ms "
+        f"p99={p99 * 1000:7.3f}ms max={ordered[-1] * 1000:7.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        setup = create_engine(url)
+        Base.metadata.create_all(bind=setup)
+        with sessionmaker(bind=setup)() as db:
+            conversation = Conversation(doctor_language="en", patient_language="es")
+            db.add(conversation)
+            db.commit()
+            conversation_id = conversation.id
+        setup.dispose()
+
+        for mode in ("sync", "async"):
+            samples = asyncio.run(_run(mode, url, conversation_id, args.writers, args.writes))
+            _report(mode, samples)
+
+
+if __name__ == "__main__":
+    main()
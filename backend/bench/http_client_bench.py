@@ -0,0 +1,100 @@
+"""Compare per-call httpx clients against the shared pooled client.
+
+Run from the repository root:
+
+    python -m backend.bench.http_client_bench --requests 200 --connect-delay-ms 50
+
+The stub server sleeps ``--connect-delay-ms`` once per new TCP connection to
+stand in for the TCP+TLS handshake to a remote AI vendor.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from backend.app.services.http_client import build_http_client
+
+
+def _make_handler(connect_delay: float) -> type[BaseHTTPRequestHandler]:
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            time.sleep(connect_delay)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            body = json.dumps({"choices": [{"message": {"content": "hola"}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            return
+
+    return StubHandler
+
+
+async def _per_call(url: str, count: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(count):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=10) as client:
+            (await client.post(url, json={"text": "hello"})).raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _shared(url: str, count: int) -> list[float]:
+    timings: list[float] = []
+    client = build_http_client()
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            (await client.post(url, json={"text": "hello"})).raise_for_status()
+            timings.append(time.perf_counter() - start)
+    finally:
+        await client.aclose()
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(timings) * 1000:7.2f}ms "
+        f"p50={statistics.median(timings) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--connect-delay-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(args.connect_delay_ms / 1000))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+    try:
+        _report("per-call", asyncio.run(_per_call(url, args.requests)))
+        _report("shared", asyncio.run(_shared(url, args.requests)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
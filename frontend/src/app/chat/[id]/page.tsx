@@ -2,8 +2,8 @@
 
 import Link from "next/link";
 import { useParams, useRouter, useSearchParams } from "next/navigation";
-import { useEffect, useMemo, useRef, useState } from "react";
-import { api, Conversation, Message, Role } from "@/lib/api";
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
+import { api, Conversation, Message, Role, UploadSlot } from "@/lib/api";
 
 function fmtDate(value: string): string {
   const dt = new Date(value);
@@ -22,6 +22,9 @@ function isFallbackTranslation(msg: Message): boolean {
 function displayTextForViewer(msg: Message, viewerRole: Role): string {
   const isOwn = msg.role === viewerRole;
   if (msg.modality === "audio") {
+    if (msg.status === "pending") {
+      return "[Transcribing...]";
+    }
     if (isOwn) {
       return msg.transcript_text || "[Audio message]";
     }
@@ -48,19 +51,48 @@ export default function ChatPage() {
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
   const [sending, setSending] = useState(false);
+  const [draftTranslation, setDraftTranslation] = useState("");
   const [summarizing, setSummarizing] = useState(false);
   const [summary, setSummary] = useState<{ summary: string; extracted: Record<string, string[]> } | null>(null);
 
   const [recording, setRecording] = useState(false);
   const [uploadingAudio, setUploadingAudio] = useState(false);
   const [copied, setCopied] = useState<"" | "doctor" | "patient">("");
+  const [live, setLive] = useState(false);
+  const [streamVoice, setStreamVoice] = useState(false);
+  const [liveTranscript, setLiveTranscript] = useState("");
 
   const recorderRef = useRef<MediaRecorder | null>(null);
   const chunksRef = useRef<Blob[]>([]);
-  const stopRef = useRef(false);
   const failureRef = useRef(0);
+  const voiceStopRef = useRef(false);
+  const segmentTimerRef = useRef<number | undefined>(undefined);
+  const slotsRef = useRef<Array<{ slot: UploadSlot; expiresAt: number }>>([]);
 
   const lastMessageId = messages.length ? messages[messages.length - 1].id : undefined;
+  const lastMessageIdRef = useRef<string | undefined>(undefined);
+  lastMessageIdRef.current = lastMessageId;
+
+  const mergeMessages = useCallback((items: Message[]) => {
+    if (items.length === 0) {
+      return;
+    }
+    setMessages((prev) => {
+      const index = new Map(prev.map((m, i) => [m.id, i]));
+      const next = [...prev];
+      for (const item of items) {
+        const existing = index.get(item.id);
+        if (existing === undefined) {
+          index.set(item.id, next.length);
+          next.push(item);
+        } else {
+          // Background transcription publishes the same message again once it completes.
+          next[existing] = item;
+        }
+      }
+      return next;
+    });
+  }, []);
 
   const sourceLanguage = useMemo(() => (role === "doctor" ? conversation?.doctor_language : conversation?.patient_language), [role, conversation]);
   const targetLanguage = useMemo(() => (role === "doctor" ? conversation?.patient_language : conversation?.doctor_language), [role, conversation]);
@@ -93,50 +125,87 @@ export default function ChatPage() {
     boot();
     return () => {
       mounted = false;
-      stopRef.current = true;
     };
   }, [conversationId]);
 
   useEffect(() => {
-    if (!conversation) {
+    if (!conversation || typeof WebSocket === "undefined") {
       return;
     }
-    stopRef.current = false;
+    let disposed = false;
+    const socket = new WebSocket(api.conversationSocketUrl(conversationId));
+    socket.onopen = () => {
+      setLive(true);
+      // Catch up on anything sent between the initial load and the subscription.
+      api.listMessages(conversationId, lastMessageIdRef.current).then((result) => mergeMessages(result.items)).catch(() => {});
+    };
+    socket.onmessage = (event: MessageEvent<string>) => {
+      mergeMessages([JSON.parse(event.data) as Message]);
+    };
+    socket.onclose = () => {
+      if (!disposed) {
+        setLive(false);
+      }
+    };
+    return () => {
+      disposed = true;
+      socket.close();
+    };
+  }, [conversation, conversationId, mergeMessages]);
+
+  useEffect(() => {
+    if (!conversation || live) {
+      return;
+    }
+    // One loop per effect run: the cursor is read from the ref, so new
+    // messages do not restart the loop, and cleanup stops only this loop.
+    let cancelled = false;
+    let timer: number | undefined;
 
     const poll = async () => {
-      if (stopRef.current) {
+      if (cancelled) {
         return;
       }
       try {
-        const latestId = lastMessageId;
-        const result = await api.listMessages(conversationId, latestId);
-        if (result.items.length > 0) {
-          setMessages((prev) => {
-            const seen = new Set(prev.map((m) => m.id));
-            const next = [...prev];
-            for (const item of result.items) {
-              if (!seen.has(item.id)) {
-                next.push(item);
-              }
-            }
-            return next;
-          });
+        // Long-poll: the server holds the request until a message arrives or the wait elapses.
+        const result = await api.listMessages(conversationId, lastMessageIdRef.current, 25);
+        if (cancelled) {
+          return;
         }
+        mergeMessages(result.items);
         failureRef.current = 0;
       } catch {
         failureRef.current += 1;
       }
+      if (cancelled) {
+        return;
+      }
 
-      const delay = failureRef.current >= 3 ? 4000 : 2000;
-      window.setTimeout(poll, delay);
+      const delay = failureRef.current >= 3 ? 4000 : failureRef.current > 0 ? 2000 : 250;
+      timer = window.setTimeout(poll, delay);
     };
 
-    const timer = window.setTimeout(poll, 2000);
+    timer = window.setTimeout(poll, 250);
     return () => {
-      stopRef.current = true;
+      cancelled = true;
       clearTimeout(timer);
     };
-  }, [conversation, conversationId, lastMessageId]);
+  }, [conversation, conversationId, live, mergeMessages]);
+
+  const pendingIds = messages.filter((m) => m.status === "pending").map((m) => m.id).join(",");
+
+  useEffect(() => {
+    if (live || !pendingIds) {
+      return;
+    }
+    // Long-polling only delivers new messages, so pending transcripts are refreshed directly.
+    const timer = window.setInterval(() => {
+      Promise.all(pendingIds.split(",").map((id) => api.getMessage(id)))
+        .then(mergeMessages)
+        .catch(() => {});
+    }, 3000);
+    return () => clearInterval(timer);
+  }, [live, pendingIds, mergeMessages]);
 
   const sendText = async () => {
     if (!text.trim() || !sourceLanguage || !targetLanguage) {
@@ -145,22 +214,50 @@ export default function ChatPage() {
     setSending(true);
     setError("");
     try {
-      const msg = await api.sendTextMessage({
-        conversation_id: conversationId,
-        role,
-        text: text.trim(),
-        source_language: sourceLanguage,
-        target_language: targetLanguage,
-      });
-      setMessages((prev) => [...prev, msg]);
+      const msg = await api.streamTextMessage(
+        {
+          conversation_id: conversationId,
+          role,
+          text: text.trim(),
+          source_language: sourceLanguage,
+          target_language: targetLanguage,
+        },
+        setDraftTranslation,
+      );
+      mergeMessages([msg]);
       setText("");
     } catch (e) {
       setError(e instanceof Error ? e.message : "Failed to send message");
     } finally {
+      setDraftTranslation("");
       setSending(false);
     }
   };
 
+  // Upload URLs are fetched in batches while the user is still recording, so
+  // stopping goes straight to the PUT.
+  const prefetchUploadSlots = useCallback(async () => {
+    const now = Date.now();
+    slotsRef.current = slotsRef.current.filter((entry) => entry.expiresAt > now);
+    if (slotsRef.current.length > 0) {
+      return;
+    }
+    const result = await api.presignAudioBatch({ conversation_id: conversationId, mime_type: "audio/webm", count: 3 });
+    // Leave a minute of headroom so a slot never expires mid-upload.
+    const expiresAt = Date.now() + ((result.items[0]?.expires_in ?? 600) - 60) * 1000;
+    slotsRef.current.push(...result.items.map((slot) => ({ slot, expiresAt })));
+  }, [conversationId]);
+
+  const takeUploadSlot = async (): Promise<UploadSlot> => {
+    const now = Date.now();
+    slotsRef.current = slotsRef.current.filter((entry) => entry.expiresAt > now);
+    const entry = slotsRef.current.shift();
+    if (entry) {
+      return entry.slot;
+    }
+    return api.presignAudio({ conversation_id: conversationId, mime_type: "audio/webm" });
+  };
+
   const startRecording = async () => {
     setError("");
     if (!navigator.mediaDevices || typeof MediaRecorder === "undefined") {
@@ -184,7 +281,7 @@ export default function ChatPage() {
           }
           setUploadingAudio(true);
 
-          const presign = await api.presignAudio({ conversation_id: conversationId, mime_type: "audio/webm" });
+          const presign = await takeUploadSlot();
 
           const uploadRes = await fetch(presign.upload_url, {
             method: "PUT",
@@ -200,10 +297,11 @@ export default function ChatPage() {
             conversation_id: conversationId,
             role,
             audio_url: presign.file_url,
+            object_key: presign.object_key,
             source_language: sourceLanguage,
             target_language: targetLanguage,
           });
-          setMessages((prev) => [...prev, msg]);
+          mergeMessages([msg]);
         } catch (e) {
           setError(e instanceof Error ? e.message : "Failed to process audio message");
         } finally {
@@ -217,13 +315,111 @@ export default function ChatPage() {
       rec.start();
       recorderRef.current = rec;
       setRecording(true);
+      prefetchUploadSlots().catch(() => {});
     } catch {
       setError("Microphone permission denied or unavailable");
     }
   };
 
+  // Live voice: the recorder is restarted every few seconds so each segment is
+  // a complete webm file the server can transcribe while recording continues.
+  const startStreamingRecording = async () => {
+    setError("");
+    if (!navigator.mediaDevices || typeof MediaRecorder === "undefined" || !sourceLanguage || !targetLanguage) {
+      setError("Audio recording is not supported in this browser.");
+      return;
+    }
+    let stream: MediaStream;
+    try {
+      stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    } catch {
+      setError("Microphone permission denied or unavailable");
+      return;
+    }
+
+    const socket = new WebSocket(
+      api.voiceSocketUrl(conversationId, { role, source_language: sourceLanguage, target_language: targetLanguage }),
+    );
+    const opened = new Promise<void>((resolve, reject) => {
+      socket.onopen = () => resolve();
+      socket.onerror = () => reject(new Error("Live transcription unavailable"));
+    });
+    let sendChain: Promise<void> = opened;
+
+    socket.onmessage = (event: MessageEvent<string>) => {
+      const data = JSON.parse(event.data) as
+        | { type: "partial"; transcript: string }
+        | { type: "message"; message: Message }
+        | { type: "error"; detail: string };
+      if (data.type === "partial") {
+        setLiveTranscript(data.transcript);
+      } else if (data.type === "message") {
+        mergeMessages([data.message]);
+        setLiveTranscript("");
+        setUploadingAudio(false);
+      } else {
+        setError(data.detail);
+      }
+    };
+    socket.onclose = () => {
+      setUploadingAudio(false);
+      setLiveTranscript("");
+    };
+
+    voiceStopRef.current = false;
+    const recordSegment = () => {
+      const rec = new MediaRecorder(stream, { mimeType: "audio/webm" });
+      const parts: Blob[] = [];
+      rec.ondataavailable = (event: BlobEvent) => {
+        if (event.data.size > 0) {
+          parts.push(event.data);
+        }
+      };
+      rec.onstop = () => {
+        const last = voiceStopRef.current;
+        if (!last) {
+          recordSegment();
+        }
+        const blob = new Blob(parts, { type: "audio/webm" });
+        sendChain = sendChain
+          .then(async () => {
+            if (blob.size > 0) {
+              socket.send(await blob.arrayBuffer());
+            }
+            if (last) {
+              socket.send(JSON.stringify({ type: "end" }));
+            }
+          })
+          .catch((e) => {
+            setError(e instanceof Error ? e.message : "Failed to stream audio");
+            setUploadingAudio(false);
+          });
+        if (last) {
+          for (const track of stream.getTracks()) {
+            track.stop();
+          }
+        }
+      };
+      rec.start();
+      recorderRef.current = rec;
+      segmentTimerRef.current = window.setTimeout(() => {
+        if (rec.state === "recording") {
+          rec.stop();
+        }
+      }, 4000);
+    };
+
+    recordSegment();
+    setRecording(true);
+  };
+
   const stopRecording = () => {
     if (recorderRef.current && recording) {
+      voiceStopRef.current = true;
+      clearTimeout(segmentTimerRef.current);
+      if (streamVoice) {
+        setUploadingAudio(true);
+      }
       recorderRef.current.stop();
       setRecording(false);
     }
@@ -264,6 +460,7 @@ export default function ChatPage() {
           <div className="column" style={{ gap: 4 }}>
             <h2 style={{ margin: 0 }}>{conversation.title || "Conversation"}</h2>
             <span className="badge">Role: {role}</span>
+            <span className="badge">{live ? "Live" : "Polling"}</span>
             <span className="badge">
               {conversation.doctor_language} -&gt; {conversation.patient_language}
             </span>
@@ -317,6 +514,20 @@ export default function ChatPage() {
               ) : null}
             </article>
           ))}
+          {sending && draftTranslation ? (
+            <article className={`msg ${role}`}>
+              <div className="msg-meta">{role} | text | translating...</div>
+              <p className="msg-main">
+                <strong>Translating:</strong> {draftTranslation}
+              </p>
+            </article>
+          ) : null}
+          {liveTranscript ? (
+            <article className={`msg ${role}`}>
+              <div className="msg-meta">{role} | audio | transcribing...</div>
+              <p className="msg-main">{liveTranscript}</p>
+            </article>
+          ) : null}
         </div>
 
         <div className="column">
@@ -335,12 +546,25 @@ export default function ChatPage() {
               {sending ? "Sending..." : "Send Text"}
             </button>
             {!recording ? (
-              <button className="button secondary" disabled={uploadingAudio} onClick={startRecording}>
+              <button
+                className="button secondary"
+                disabled={uploadingAudio}
+                onClick={streamVoice ? startStreamingRecording : startRecording}
+              >
                 {uploadingAudio ? "Processing audio..." : "Start Recording"}
               </button>
             ) : (
               <button className="button secondary" onClick={stopRecording}>Stop Recording</button>
             )}
+            <label className="row">
+              <input
+                type="checkbox"
+                checked={streamVoice}
+                disabled={recording || uploadingAudio}
+                onChange={(e) => setStreamVoice(e.target.checked)}
+              />
+              <span>Live transcript</span>
+            </label>
             <button className="button secondary" disabled={summarizing} onClick={generateSummary}>
               {summarizing ? "Generating..." : "Generate Summary"}
             </button>
@@ -13,14 +13,6 @@ type SearchItem = {
   snippet: string;
 };
 
-function mark(text: string, needle: string): string {
-  if (!needle.trim()) {
-    return text;
-  }
-  const escaped = needle.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
-  return text.replace(new RegExp(`(${escaped})`, "ig"), "<mark>$1</mark>");
-}
-
 function SearchPageInner() {
   const params = useSearchParams();
   const defaultConversation = params.get("conversation_id") || "";
@@ -28,6 +20,8 @@ function SearchPageInner() {
   const [query, setQuery] = useState("");
   const [conversationId, setConversationId] = useState(defaultConversation);
   const [items, setItems] = useState<SearchItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [activeQuery, setActiveQuery] = useState<{ q: string; conversationId?: string } | null>(null);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(false);
 
@@ -42,11 +36,31 @@ function SearchPageInner() {
     setError("");
     setLoading(true);
     try {
-      const result = await api.search(query.trim(), conversationId.trim() || undefined);
+      const active = { q: query.trim(), conversationId: conversationId.trim() || undefined };
+      const result = await api.search(active.q, active.conversationId);
       setItems(result.items as SearchItem[]);
+      setNextCursor(result.next_cursor);
+      setActiveQuery(active);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Search failed");
       setItems([]);
+      setNextCursor(null);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadMore = async () => {
+    if (!activeQuery || !nextCursor) {
+      return;
+    }
+    setLoading(true);
+    try {
+      const result = await api.search(activeQuery.q, activeQuery.conversationId, nextCursor);
+      setItems((prev) => [...prev, ...(result.items as SearchItem[])]);
+      setNextCursor(result.next_cursor);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Search failed");
     } finally {
       setLoading(false);
     }
@@ -87,7 +101,8 @@ function SearchPageInner() {
                 <div className="msg-meta">
                   {item.role} | {new Date(item.created_at).toLocaleString()}
                 </div>
-                <div dangerouslySetInnerHTML={{ __html: mark(item.snippet, query) }} />
+                {/* The server escapes snippets; <mark> is the only markup. */}
+                <div dangerouslySetInnerHTML={{ __html: item.snippet }} />
                 <div style={{ marginTop: 10 }}>
                   <Link className="button secondary" href={`/chat/${item.conversation_id}#msg-${item.message_id}`}>
                     Open Message Context
@@ -95,6 +110,11 @@ function SearchPageInner() {
                 </div>
               </article>
             ))}
+            {nextCursor ? (
+              <button className="button secondary" type="button" disabled={loading} onClick={loadMore}>
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            ) : null}
           </div>
         ) : (
           !loading && <p>No results yet.</p>
@@ -2,6 +2,7 @@ export const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL || "http://loca
 
 export type Role = "doctor" | "patient";
 export type Modality = "text" | "audio";
+export type MessageStatus = "pending" | "ready" | "failed";
 
 export type Conversation = {
   id: string;
@@ -23,6 +24,14 @@ export type Message = {
   source_language: string;
   target_language: string;
   created_at: string;
+  status?: MessageStatus | null;
+};
+
+export type UploadSlot = {
+  upload_url: string;
+  file_url: string;
+  object_key: string;
+  expires_in?: number | null;
 };
 
 async function request<T>(path: string, options?: RequestInit): Promise<T> {
@@ -44,6 +53,68 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
   return (await res.json()) as T;
 }
 
+export type TextMessagePayload = {
+  conversation_id: string;
+  role: Role;
+  text: string;
+  source_language: string;
+  target_language: string;
+};
+
+async function streamTextMessage(payload: TextMessagePayload, onDelta: (partial: string) => void): Promise<Message> {
+  const res = await fetch(`${API_BASE_URL}/api/messages/text/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(payload),
+    cache: "no-store",
+  });
+  if (!res.ok || !res.body) {
+    const body = await res.text();
+    throw new Error(body || `Request failed: ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let partial = "";
+  let final: Message | null = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      const data: string[] = [];
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          data.push(line.slice(5).trimStart());
+        }
+      }
+      if (event === "delta") {
+        partial += (JSON.parse(data.join("\n")) as { text: string }).text;
+        onDelta(partial);
+      } else if (event === "message") {
+        final = JSON.parse(data.join("\n")) as Message;
+      }
+    }
+  }
+
+  if (!final) {
+    throw new Error("Translation stream ended without a message");
+  }
+  return final;
+}
+
 export const api = {
   createConversation: (payload: { doctor_language: string; patient_language: string; title?: string }) =>
     request<Conversation>("/api/conversations", {
@@ -53,25 +124,36 @@ export const api = {
 
   getConversation: (id: string) => request<Conversation>(`/api/conversations/${id}`),
 
-  listMessages: (id: string, afterId?: string) =>
+  voiceSocketUrl: (id: string, params: { role: Role; source_language: string; target_language: string }) =>
+    `${API_BASE_URL.replace(/^http/, "ws")}/api/conversations/${id}/voice?${new URLSearchParams(params).toString()}`,
+
+  conversationSocketUrl: (id: string) => `${API_BASE_URL.replace(/^http/, "ws")}/api/conversations/${id}/ws`,
+
+  listMessages: (id: string, afterId?: string, waitSeconds?: number) =>
     request<{ items: Message[] }>(
-      `/api/conversations/${id}/messages?limit=50${afterId ? `&after_id=${encodeURIComponent(afterId)}` : ""}`,
+      `/api/conversations/${id}/messages?limit=50${afterId ? `&after_id=${encodeURIComponent(afterId)}` : ""}${
+        waitSeconds ? `&wait=${waitSeconds}` : ""
+      }`,
     ),
 
-  sendTextMessage: (payload: {
-    conversation_id: string;
-    role: Role;
-    text: string;
-    source_language: string;
-    target_language: string;
-  }) =>
+  getMessage: (id: string) => request<Message>(`/api/messages/${id}`),
+
+  sendTextMessage: (payload: TextMessagePayload) =>
     request<Message>("/api/messages/text", {
       method: "POST",
       body: JSON.stringify(payload),
     }),
 
+  streamTextMessage,
+
   presignAudio: (payload: { conversation_id: string; mime_type: string }) =>
-    request<{ upload_url: string; file_url: string; object_key: string }>("/api/audio/presign", {
+    request<UploadSlot>("/api/audio/presign", {
+      method: "POST",
+      body: JSON.stringify(payload),
+    }),
+
+  presignAudioBatch: (payload: { conversation_id: string; mime_type: string; count: number }) =>
+    request<{ items: UploadSlot[] }>("/api/audio/presign/batch", {
       method: "POST",
       body: JSON.stringify(payload),
     }),
@@ -79,7 +161,8 @@ export const api = {
   finalizeAudio: (payload: {
     conversation_id: string;
     role: Role;
-    audio_url: string;
+    audio_url?: string;
+    object_key?: string;
     source_language: string;
     target_language: string;
   }) =>
@@ -88,9 +171,14 @@ export const api = {
       body: JSON.stringify(payload),
     }),
 
-  search: (q: string, conversationId?: string) =>
-    request<{ items: Array<{ message_id: string; conversation_id: string; role: Role; created_at: string; snippet: string }> }>(
-      `/api/search?q=${encodeURIComponent(q)}${conversationId ? `&conversation_id=${encodeURIComponent(conversationId)}` : ""}`,
+  search: (q: string, conversationId?: string, cursor?: string) =>
+    request<{
+      items: Array<{ message_id: string; conversation_id: string; role: Role; created_at: string; snippet: string }>;
+      next_cursor: string | null;
+    }>(
+      `/api/search?q=${encodeURIComponent(q)}${conversationId ? `&conversation_id=${encodeURIComponent(conversationId)}` : ""}${
+        cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""
+      }`,
     ),
 
   summarize: (conversationId: string, style: "concise" | "clinical" = "concise") =>